@@ -1,11 +1,17 @@
+import asyncio
 import time
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
-from fastapi.responses import StreamingResponse
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form, Response, status
+from fastapi.responses import StreamingResponse, PlainTextResponse
+from starlette.background import BackgroundTasks
 from datetime import datetime
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_admin, get_profiler
 from app.models.user import User
-from app.schema.bot import PDFQuestionResponse
-from app.core.utils import PDFExtractor,LLMService,CommonUtil,CacheUtil
+from app.schema.bot import PDFQuestionResponse, DocumentCacheStats, RevisionDiff
+from app.core.utils import PDFExtractor,LLMService,CommonUtil,CacheUtil,StreamStats
+from app.core.limiter import llm_limiter, user_rate_limiter
+from app.core.profiling import get_profile
+from app.core.revisions import diff_pages
 
 
 
@@ -14,39 +20,57 @@ router = APIRouter()
 
 @router.post("/ask/", response_model=PDFQuestionResponse)
 async def ask_pdf_question(
+    response: Response,
     file: UploadFile = File(description="PDF file to analyze"),
     question: str = Form(min_length=5, max_length=500, description="Question about the PDF"),
-    current_user: User = Depends(get_current_user)
+    engine: Optional[str] = Form(None, description="PDF extraction engine (pypdfium2, pdfminer or pdfplumber)"),
+    current_user: User = Depends(get_current_user),
+    profiler = Depends(get_profiler)
 ):
     """
     Upload a PDF file and ask a question about its content.
     
     - **file**: PDF file (Fix the size in the .env MAX_FILE_SIZE variable)
     - **question**: Question about the PDF content
+    - **engine**: Optional extraction engine override (defaults to PDF_ENGINE in the .env)
+    
+    Admins can send "X-Profile: 1" (or ?profile=1) to profile the request; the
+    profile ID is returned in the X-Profile-Id header.
     
     Returns the answer based on the PDF content or "NOT_FOUND" if question is irrelevant.
     """
     
     try: 
         start_time = time.time()
-        file_content = await CommonUtil.validate_pdf_file(file)
-        pdf_text = PDFExtractor.extract_text(file_content)
+        if profiler.request_id:
+            response.headers["X-Profile-Id"] = profiler.request_id
+        user_rate_limiter.consume(current_user.id)
+        with profiler.stage("validate"):
+            file_content = await CommonUtil.validate_pdf_file(file)
+        with profiler.stage("extract"):
+            document = await PDFExtractor.load_document(file_content, engine=engine)
+            pdf_text = document.text
         llm_service = LLMService()
         
         # --- CACHE CHECK ---
-        cache_key = CacheUtil.generate_key(pdf_text, question)
-        cached = CacheUtil.get_cached_answer(cache_key)
+        with profiler.stage("cache_lookup"):
+            cache_key = CacheUtil.generate_key(document.document_hash, question)
+            cached = CacheUtil.get_cached_answer(cache_key)
         if cached:
             return PDFQuestionResponse(
                 question=question,
                 answer=cached,
                 pdf_filename=file.filename,
+                document_id=document.document_hash,
                 extracted_text_length=len(pdf_text),
                 processing_time=round(time.time() - start_time, 2),
-                timestamp=datetime.now()
+                timestamp=datetime.now(),
+                normalization=document.normalization
             )
         
-        answer = llm_service.answer_question(pdf_text, question)
+        async with llm_limiter.slot():
+            with profiler.stage("llm"):
+                answer = await asyncio.to_thread(llm_service.answer_question, pdf_text, question)
         
         if answer == "NOT_FOUND":
             raise HTTPException(
@@ -54,7 +78,8 @@ async def ask_pdf_question(
                 detail="The question is not relevant to the PDF content or cannot be answered based on the document."
             )
         # --- SAVE TO CACHE ---
-        CacheUtil.set_cached_answer(cache_key, answer)
+        with profiler.stage("cache_store"):
+            CacheUtil.set_cached_answer(cache_key, answer)
         processing_time = time.time() - start_time
         
         
@@ -62,9 +87,11 @@ async def ask_pdf_question(
             question=question,
             answer=answer,
             pdf_filename=file.filename,
+            document_id=document.document_hash,
             extracted_text_length=len(pdf_text),
             processing_time=round(processing_time, 2),
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            normalization=document.normalization
         )
         
     except HTTPException:
@@ -82,47 +109,86 @@ async def ask_pdf_question(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while processing your request. Please try again."
         )
+    
+    finally:
+        profiler.finish()
         
 
 @router.post("/ask-stream/")
 async def ask_pdf_question_stream(
+    request: Request,
     file: UploadFile = File(description="PDF file to analyze"),
     question: str = Form(min_length=5, max_length=500, description="Question about the PDF"),
-    current_user: User = Depends(get_current_user)
+    engine: Optional[str] = Form(None, description="PDF extraction engine (pypdfium2, pdfminer or pdfplumber)"),
+    current_user: User = Depends(get_current_user),
+    profiler = Depends(get_profiler)
 ):
     """
     Upload a PDF file and ask a question with streaming response.
     
     - **file**: PDF file (Fix the size in the .env MAX_FILE_SIZE variable)
     - **question**: Question about the PDF content
+    - **engine**: Optional extraction engine override (defaults to PDF_ENGINE in the .env)
+    
+    Admins can send "X-Profile: 1" (or ?profile=1) to profile the request; the
+    profile ID is returned in the X-Profile-Id header and the profile is stored
+    once the stream ends.
+    
+    Generation starts as soon as the pages parsed so far can answer the question
+    (see STREAM_PIPELINE_* in the .env); the rest of a long PDF is then not parsed.
+    Such answers carry the "X-Extraction-Complete: false" header and are not cached.
+    
+    If the client disconnects, generation is cancelled and the answer is not cached.
     
     Returns the answer as a streaming response (Server-Sent Events format).
     """
     
+    streaming = False
     try:
-        file_content = await CommonUtil.validate_pdf_file(file)
-        pdf_text = PDFExtractor.extract_text(file_content)
+        headers = {"X-Profile-Id": profiler.request_id} if profiler.request_id else {}
+        background = BackgroundTasks()
+        user_rate_limiter.consume(current_user.id)
+        with profiler.stage("validate"):
+            file_content = await CommonUtil.validate_pdf_file(file)
+        with profiler.stage("extract"):
+            document = await PDFExtractor.load_document_for_question(file_content, question, engine=engine)
+            pdf_text = document.text
+        if not document.complete:
+            headers["X-Extraction-Complete"] = "false"
         llm_service = LLMService()
         # --- CACHE CHECK ---
-        cache_key = CacheUtil.generate_key(pdf_text, question)
-        cached = CacheUtil.get_cached_answer(cache_key)
+        with profiler.stage("cache_lookup"):
+            cache_key = CacheUtil.generate_key(document.document_hash, question)
+            cached = CacheUtil.get_cached_answer(cache_key)
         
         if cached:
             async def cached_stream():
                 yield f"data: {cached}\n\n"
-            return StreamingResponse(cached_stream(), media_type="text/event-stream")
+            return StreamingResponse(cached_stream(), media_type="text/event-stream", headers=headers)
         
+        # the slot is held for the whole stream and released by whichever ends first:
+        # the generator finishing or the response being torn down
+        with profiler.stage("llm_wait"):
+            slot = await llm_limiter.acquire()
+        background.add_task(slot.release)
+        background.add_task(profiler.finish)
         stream = CommonUtil.generate_stream_response(
             llm_service=llm_service,
             pdf_text=pdf_text,
             filename=file.filename,
             question=question,
-            cache_key=cache_key
+            # answers drawn from part of the document are not cached for the whole of it
+            cache_key=cache_key if document.complete else None,
+            slot=slot,
+            request=request
         )
         
+        streaming = True
         return StreamingResponse(
-            stream,
+            profiler.wrap_iter(stream, "llm_stream"),
             media_type="text/event-stream",
+            headers=headers,
+            background=background,
         )
         
     except HTTPException:
@@ -139,3 +205,72 @@ async def ask_pdf_question_stream(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="An error occurred while processing your request. Please try again."
         )
+    
+    finally:
+        # once streaming starts the profile is stored by the response's background task
+        if not streaming:
+            profiler.finish()
+
+
+@router.get("/documents/{document_id}/cache/", response_model=DocumentCacheStats)
+def get_document_cache_stats(document_id: str, current_user: User = Depends(get_current_admin)):
+    """
+    Cached answer count and hit/miss counters for one document (document_id is returned by /ask/, admin only)
+    """
+    return CacheUtil.document_stats(document_id)
+
+
+@router.delete("/documents/{document_id}/cache/")
+def invalidate_document_cache(document_id: str, current_user: User = Depends(get_current_admin)):
+    """
+    Drop every cached answer for one document (admin only)
+    """
+    removed = CacheUtil.invalidate_document(document_id)
+    return {"message": f"Removed {removed} cached answers.", "removed": removed}
+
+
+
+@router.get("/documents/{document_id}/diff/{previous_document_id}/", response_model=RevisionDiff)
+def get_revision_diff(document_id: str, previous_document_id: str, current_user: User = Depends(get_current_admin)):
+    """
+    Pages that stayed the same, changed, were added or were removed between two
+    uploaded revisions of a PDF (both must have been uploaded within EXTRACTION_CACHE_TTL, admin only)
+    """
+    page_hashes = CacheUtil.get_page_hashes(document_id)
+    previous_page_hashes = CacheUtil.get_page_hashes(previous_document_id)
+    if page_hashes is None or previous_page_hashes is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Document not found or expired. Upload both revisions again."
+        )
+    return {
+        "document_id": document_id,
+        "previous_document_id": previous_document_id,
+        **diff_pages(previous_page_hashes, page_hashes),
+    }
+
+@router.get("/profiles/{request_id}/")
+def get_request_profile(request_id: str, format: str = "json", current_user: User = Depends(get_current_admin)):
+    """
+    Profile of a request made with "X-Profile: 1" (admin only).
+    
+    - **format**: "json" for stage timings and samples, "folded" for collapsed
+      stacks that flamegraph.pl and speedscope read directly
+    """
+    profile = get_profile(request_id)
+    if not profile:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Profile not found or expired."
+        )
+    if format == "folded":
+        return PlainTextResponse(profile["folded"])
+    return profile
+
+
+@router.get("/stream-stats/")
+def get_stream_stats(current_user: User = Depends(get_current_admin)):
+    """
+    How answer streams ended across all workers: completed, aborted by a client disconnect, or failed (admin only)
+    """
+    return StreamStats.get()
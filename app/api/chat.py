@@ -0,0 +1,207 @@
+import asyncio
+import time
+from typing import Optional
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, UploadFile, File, Form, status
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.schema.chat import ChatSessionResponse, ChatHistoryResponse, ChatAnswerResponse
+from app.core.utils import PDFExtractor,LLMService,CommonUtil
+from app.core.chat import ChatSessionStore
+from app.core.limiter import llm_limiter, user_rate_limiter
+
+
+router = APIRouter()
+
+
+async def compact_session(session_id: str, llm_service: LLMService):
+    """Summarize older turns once the history is over the limit (runs after the response is sent)"""
+    _, turns = ChatSessionStore.get_history(session_id)
+    if not ChatSessionStore.needs_compaction(len(turns)):
+        return
+    with ChatSessionStore.compaction_lock(session_id) as locked:
+        if not locked:
+            return
+        try:
+            async with llm_limiter.slot():
+                await asyncio.to_thread(ChatSessionStore.compact, session_id, llm_service)
+        except HTTPException:
+            # the LLM is saturated; the next turn tries again
+            pass
+
+
+
+def save_streamed_turn(session_id: str, question: str, answer: str):
+    """Keep a streamed answer in the history, unless it is NOT_FOUND (rejected with 404 when not streaming)"""
+    if answer.strip() != "NOT_FOUND":
+        ChatSessionStore.append_turn(session_id, question, answer)
+
+@router.post("/sessions/", response_model=ChatSessionResponse, status_code=status.HTTP_201_CREATED)
+async def create_chat_session(
+    file: UploadFile = File(description="PDF file to chat about"),
+    engine: Optional[str] = Form(None, description="PDF extraction engine (pypdfium2, pdfminer or pdfplumber)"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Upload a PDF once and start a chat session about it.
+
+    - **file**: PDF file (Fix the size in the .env MAX_FILE_SIZE variable)
+    - **engine**: Optional extraction engine override (defaults to PDF_ENGINE in the .env)
+
+    Returns the session ID to use for follow-up questions.
+    """
+    try:
+        user_rate_limiter.consume(current_user.id)
+        file_content = await CommonUtil.validate_pdf_file(file)
+        document = await PDFExtractor.load_document(file_content, engine=engine)
+        session = ChatSessionStore.create(current_user.id, file.filename, document.text)
+        return {**session, "normalization": document.normalization}
+
+    except HTTPException:
+        raise
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing your request. Please try again."
+        )
+
+
+@router.get("/sessions/{session_id}/", response_model=ChatHistoryResponse)
+def get_chat_session(session_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Return the running summary and the recent turns of a chat session
+    """
+    meta = ChatSessionStore.get(session_id, current_user.id)
+    summary, turns = ChatSessionStore.get_history(session_id)
+    return {**meta, "summary": summary, "turns": turns}
+
+
+@router.delete("/sessions/{session_id}/", status_code=status.HTTP_204_NO_CONTENT)
+def delete_chat_session(session_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Delete a chat session with its document and history
+    """
+    ChatSessionStore.get(session_id, current_user.id)
+    ChatSessionStore.delete(session_id)
+
+
+@router.post("/sessions/{session_id}/ask/", response_model=ChatAnswerResponse)
+async def ask_chat_question(
+    session_id: str,
+    background_tasks: BackgroundTasks,
+    question: str = Form(min_length=5, max_length=500, description="Question about the PDF"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Ask a follow-up question in a chat session.
+
+    - **question**: Question about the PDF content, may refer to earlier turns
+
+    Returns the answer or 404 if the question cannot be answered from the document.
+    """
+    try:
+        start_time = time.time()
+        user_rate_limiter.consume(current_user.id)
+        ChatSessionStore.get(session_id, current_user.id)
+        pdf_text = ChatSessionStore.get_document(session_id)
+        summary, history = ChatSessionStore.get_history(session_id)
+        llm_service = LLMService()
+
+        async with llm_limiter.slot():
+            answer = await asyncio.to_thread(
+                llm_service.answer_question, pdf_text, question, history=history, summary=summary
+            )
+
+        if answer == "NOT_FOUND":
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="The question is not relevant to the PDF content or cannot be answered based on the document."
+            )
+
+        ChatSessionStore.append_turn(session_id, question, answer)
+        background_tasks.add_task(compact_session, session_id, llm_service)
+
+        return ChatAnswerResponse(
+            session_id=session_id,
+            question=question,
+            answer=answer,
+            processing_time=round(time.time() - start_time, 2),
+            timestamp=datetime.now()
+        )
+
+    except HTTPException:
+        raise
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing your request. Please try again."
+        )
+
+
+@router.post("/sessions/{session_id}/ask-stream/")
+async def ask_chat_question_stream(
+    session_id: str,
+    request: Request,
+    question: str = Form(min_length=5, max_length=500, description="Question about the PDF"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Ask a follow-up question in a chat session with streaming response.
+
+    - **question**: Question about the PDF content, may refer to earlier turns
+
+    Returns the answer as a streaming response (Server-Sent Events format).
+    """
+    try:
+        user_rate_limiter.consume(current_user.id)
+        ChatSessionStore.get(session_id, current_user.id)
+        pdf_text = ChatSessionStore.get_document(session_id)
+        summary, history = ChatSessionStore.get_history(session_id)
+        llm_service = LLMService()
+
+        slot = await llm_limiter.acquire()
+        stream = CommonUtil.stream_chunks(
+            llm_service.answer_question(pdf_text, question, stream=True, history=history, summary=summary),
+            on_complete=lambda answer: save_streamed_turn(session_id, question, answer),
+            slot=slot,
+            request=request
+        )
+
+        tasks = BackgroundTasks()
+        tasks.add_task(slot.release)
+        tasks.add_task(compact_session, session_id, llm_service)
+        return StreamingResponse(
+            stream,
+            media_type="text/event-stream",
+            background=tasks,
+        )
+
+    except HTTPException:
+        raise
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing your request. Please try again."
+        )
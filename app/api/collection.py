@@ -0,0 +1,161 @@
+import asyncio
+import re
+import time
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
+from datetime import datetime
+from app.api.deps import get_current_user
+from app.models.user import User
+from app.schema.collection import CollectionDocument, CollectionAnswerResponse
+from app.core.utils import PDFExtractor,LLMService,CommonUtil,CacheUtil
+from app.core.collection import DocumentCollection
+from app.core.revisions import diff_pages
+from app.core.config import settings
+from app.core.limiter import llm_limiter, user_rate_limiter
+
+
+router = APIRouter()
+
+CITATION_RE = re.compile(r"\[(\d+)\]")
+
+
+def build_citations(answer: str, passages: List[dict]) -> List[dict]:
+    """Passages cited as [n] in the answer, or every retrieved passage when none are cited"""
+    cited = [int(number) for number in dict.fromkeys(CITATION_RE.findall(answer))]
+    selected = [passages[number - 1] for number in cited if 0 < number <= len(passages)] or passages
+    return [
+        {
+            "document_id": passage["document_id"],
+            "pdf_filename": passage["pdf_filename"],
+            "page": passage["page"],
+            "score": passage["score"],
+            "snippet": passage["text"][:300],
+        }
+        for passage in selected
+    ]
+
+
+@router.post("/documents/", response_model=CollectionDocument, status_code=status.HTTP_201_CREATED)
+async def add_collection_document(
+    file: UploadFile = File(description="PDF file to add to your collection"),
+    engine: Optional[str] = Form(None, description="PDF extraction engine (pypdfium2, pdfminer or pdfplumber)"),
+    replaces: Optional[str] = Form(None, description="document_id of the previous revision of this PDF in your collection"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Add a PDF to your document collection. Uploading the same file again re-indexes it.
+
+    - **file**: PDF file (Fix the size in the .env MAX_FILE_SIZE variable)
+    - **engine**: Optional extraction engine override (defaults to PDF_ENGINE in the .env)
+    - **replaces**: Optional document_id of an earlier revision; only the pages that changed are re-indexed
+    """
+    try:
+        user_rate_limiter.consume(current_user.id)
+        file_content = await CommonUtil.validate_pdf_file(file)
+        document = await PDFExtractor.load_document(file_content, engine=engine)
+        collection = DocumentCollection(current_user.id)
+
+        previous_page_hashes = None
+        if replaces:
+            collection.get_document(replaces)
+            previous_page_hashes = CacheUtil.get_page_hashes(replaces)
+        page_hashes = CacheUtil.get_page_hashes(document.document_hash)
+
+        if previous_page_hashes and page_hashes and len(page_hashes) == len(document.pages):
+            diff = diff_pages(previous_page_hashes, page_hashes)
+            meta = collection.update_document(replaces, document.document_hash, file.filename, document.pages, diff)
+        else:
+            # without page hashes for both revisions the whole document is re-indexed
+            if replaces:
+                collection.remove_document(replaces)
+            meta = collection.add_document(document.document_hash, file.filename, document.pages)
+        return {**meta, "normalization": document.normalization}
+
+    except HTTPException:
+        raise
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing your request. Please try again."
+        )
+
+
+@router.get("/documents/", response_model=List[CollectionDocument])
+def list_collection_documents(current_user: User = Depends(get_current_user)):
+    """
+    List the documents in your collection
+    """
+    return DocumentCollection(current_user.id).list_documents()
+
+
+@router.delete("/documents/{document_id}/", status_code=status.HTTP_204_NO_CONTENT)
+def remove_collection_document(document_id: str, current_user: User = Depends(get_current_user)):
+    """
+    Remove a document and its passages from your collection
+    """
+    DocumentCollection(current_user.id).remove_document(document_id)
+
+
+@router.post("/ask/", response_model=CollectionAnswerResponse)
+async def ask_collection_question(
+    question: str = Form(min_length=5, max_length=500, description="Question across your documents"),
+    top_k: int = Form(settings.COLLECTION_TOP_K, ge=1, le=20, description="Number of passages to retrieve"),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Ask one question across every document in your collection.
+
+    - **question**: Question about the content of your documents
+    - **top_k**: Number of passages retrieved across the collection
+
+    Returns the answer with citations to the documents and pages it was drawn from.
+    """
+    try:
+        start_time = time.time()
+        user_rate_limiter.consume(current_user.id)
+        passages = DocumentCollection(current_user.id).search(question, top_k)
+        if not passages:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No passages in your collection match this question."
+            )
+
+        llm_service = LLMService()
+        async with llm_limiter.slot():
+            answer = await asyncio.to_thread(llm_service.answer_from_passages, question, passages)
+
+        if answer == "NOT_FOUND":
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="The question cannot be answered from the documents in your collection."
+            )
+
+        return CollectionAnswerResponse(
+            question=question,
+            answer=answer,
+            citations=build_citations(answer, passages),
+            processing_time=round(time.time() - start_time, 2),
+            timestamp=datetime.now()
+        )
+
+    except HTTPException:
+        raise
+
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="An error occurred while processing your request. Please try again."
+        )
@@ -1,17 +1,19 @@
 from typing import Generator
 from app.core.config import settings
-from app.db.session import SessionLocal
+from app.db.session import SessionLocal, init_engine
 from fastapi import Depends, HTTPException, Request, status
 import jwt
 from sqlalchemy.orm import Session
 from app.models.user import User as UserModel
 from app.core.config import settings
 from app.core.security import is_token_blacklisted
+from app.core.profiling import NULL_PROFILER, RequestProfiler
 
 
 # oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 def get_db() -> Generator:
+    init_engine()
     db = SessionLocal()
     try:
         yield db
@@ -50,4 +52,25 @@ def get_current_user(request: Request, db: Session = Depends(get_db)):
     user = db.query(UserModel).filter(UserModel.id == user_id).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
-    return user
\ No newline at end of file
+    return user
+
+def get_current_admin(current_user: UserModel = Depends(get_current_user)):
+    """
+    Returns the current user if their email is listed in ADMIN_EMAILS.
+    """
+    admins = {email.strip().lower() for email in settings.ADMIN_EMAILS.split(",") if email.strip()}
+    if current_user.email.lower() not in admins:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
+
+
+def get_profiler(request: Request, current_user: UserModel = Depends(get_current_user)):
+    """
+    Returns a RequestProfiler when an admin asks for one with the "X-Profile: 1"
+    header or the "?profile=1" query flag, otherwise a no-op profiler.
+    """
+    flag = request.headers.get("X-Profile") or request.query_params.get("profile")
+    if not flag or flag.lower() not in ("1", "true", "yes"):
+        return NULL_PROFILER
+    get_current_admin(current_user)
+    return RequestProfiler(request.url.path)
@@ -0,0 +1,123 @@
+import json
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Tuple
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.redis import get_redis
+
+
+class ChatSessionStore:
+    """Redis-backed chat sessions.
+
+    A session pins one document and its turn history. Once the history grows
+    past CHAT_MAX_TURNS, the oldest turns are folded into a running summary so
+    the prompt stays bounded. The document text itself never changes, which
+    keeps the start of the prompt identical across turns for provider-side
+    prefix caching.
+    """
+
+    COMPACTION_LOCK_TTL = 120
+
+    @staticmethod
+    def _key(session_id: str, part: str) -> str:
+        return f"chat:{session_id}:{part}"
+
+    @staticmethod
+    def _touch(session_id: str):
+        pipe = get_redis().pipeline()
+        for part in ("meta", "document", "turns"):
+            pipe.expire(ChatSessionStore._key(session_id, part), settings.CHAT_SESSION_TTL)
+        pipe.execute()
+
+    @staticmethod
+    def create(user_id: int, filename: str, pdf_text: str) -> dict:
+        session_id = uuid.uuid4().hex
+        meta = {
+            "session_id": session_id,
+            "user_id": str(user_id),
+            "pdf_filename": filename,
+            "extracted_text_length": str(len(pdf_text)),
+            "created_at": datetime.now().isoformat(),
+            "summary": "",
+        }
+        pipe = get_redis().pipeline()
+        pipe.hset(ChatSessionStore._key(session_id, "meta"), mapping=meta)
+        pipe.set(ChatSessionStore._key(session_id, "document"), pdf_text)
+        pipe.execute()
+        ChatSessionStore._touch(session_id)
+        return meta
+
+    @staticmethod
+    def get(session_id: str, user_id: int) -> dict:
+        """Load session metadata, hiding sessions owned by other users"""
+        meta = get_redis().hgetall(ChatSessionStore._key(session_id, "meta"))
+        if not meta or meta.get("user_id") != str(user_id):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Chat session not found or expired."
+            )
+        return meta
+
+    @staticmethod
+    def get_document(session_id: str) -> str:
+        return get_redis().get(ChatSessionStore._key(session_id, "document")) or ""
+
+    @staticmethod
+    def get_history(session_id: str) -> Tuple[str, List[dict]]:
+        """Return the running summary and the turns not yet folded into it"""
+        pipe = get_redis().pipeline()
+        pipe.hget(ChatSessionStore._key(session_id, "meta"), "summary")
+        pipe.lrange(ChatSessionStore._key(session_id, "turns"), 0, -1)
+        summary, turns = pipe.execute()
+        return summary or "", [json.loads(turn) for turn in turns]
+
+    @staticmethod
+    def append_turn(session_id: str, question: str, answer: str) -> int:
+        """Store a completed turn and return the number of unsummarized turns"""
+        turn = json.dumps({"question": question, "answer": answer, "timestamp": datetime.now().isoformat()})
+        length = get_redis().rpush(ChatSessionStore._key(session_id, "turns"), turn)
+        ChatSessionStore._touch(session_id)
+        return length
+
+    @staticmethod
+    def needs_compaction(turn_count: int) -> bool:
+        return turn_count > settings.CHAT_MAX_TURNS
+
+    @staticmethod
+    @contextmanager
+    def compaction_lock(session_id: str):
+        """Yield True if this caller may compact the session, False if another one already is.
+
+        Two compactions of the same turns would each trim fold_count turns,
+        dropping turns that were never summarized.
+        """
+        lock_key = ChatSessionStore._key(session_id, "compacting")
+        token = uuid.uuid4().hex
+        locked = bool(get_redis().set(lock_key, token, nx=True, ex=ChatSessionStore.COMPACTION_LOCK_TTL))
+        try:
+            yield locked
+        finally:
+            if locked and get_redis().get(lock_key) == token:
+                get_redis().delete(lock_key)
+
+    @staticmethod
+    def compact(session_id: str, llm_service):
+        """Fold all but the most recent CHAT_KEEP_TURNS turns into the running summary"""
+        turns_key = ChatSessionStore._key(session_id, "turns")
+        summary, turns = ChatSessionStore.get_history(session_id)
+        fold_count = len(turns) - settings.CHAT_KEEP_TURNS
+        if fold_count <= 0:
+            return
+
+        new_summary = llm_service.summarize_conversation(summary, turns[:fold_count])
+        pipe = get_redis().pipeline()
+        pipe.hset(ChatSessionStore._key(session_id, "meta"), "summary", new_summary[:settings.CHAT_SUMMARY_MAX_CHARS])
+        # turns appended while summarizing sit after fold_count and are kept
+        pipe.ltrim(turns_key, fold_count, -1)
+        pipe.execute()
+
+    @staticmethod
+    def delete(session_id: str):
+        get_redis().delete(*(ChatSessionStore._key(session_id, part) for part in ("meta", "document", "turns")))
@@ -0,0 +1,301 @@
+import json
+import math
+import re
+import uuid
+from collections import Counter, defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.redis import get_redis
+
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("""
+a an and are as at be but by can do does for from has have how i if in into is it its
+me my no not of on or our so such than that the their them then there these they this
+to was we were what when where which who whom why will with you your about any all
+""".split())
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def _stem(token: str) -> str:
+    # plural folding only, so "terms" matches "term" without a stemming dependency
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens without stopwords or single characters"""
+    return [_stem(token) for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 and token not in STOPWORDS]
+
+
+def chunk_pages(pages: List[str], max_chars: int, page_numbers: Optional[Iterable[int]] = None) -> List[Tuple[int, str]]:
+    """Split pages (or only the given 1-based page numbers) into passages of at most ~max_chars,
+    each tagged with its 1-based page number"""
+    chunks = []
+    for page_number in page_numbers if page_numbers is not None else range(1, len(pages) + 1):
+        page = pages[page_number - 1]
+        current = ""
+        for paragraph in page.split("\n"):
+            while len(paragraph) > max_chars:
+                cut = paragraph.rfind(" ", 0, max_chars)
+                cut = cut if cut > 0 else max_chars
+                if current:
+                    chunks.append((page_number, current))
+                    current = ""
+                chunks.append((page_number, paragraph[:cut]))
+                paragraph = paragraph[cut:].lstrip()
+            if current and len(current) + len(paragraph) + 1 > max_chars:
+                chunks.append((page_number, current))
+                current = ""
+            current = f"{current}\n{paragraph}" if current else paragraph
+        if current.strip():
+            chunks.append((page_number, current))
+    return chunks
+
+
+class DocumentCollection:
+    """Per-user BM25 index over every document the user has stored.
+
+    Each document is a shard: its passages and the list of terms it
+    contributed. The shards feed one inverted index per user (a sorted set of
+    postings per term, scored by term frequency). Adding or removing a document
+    touches only its own postings. A query reads a bounded number of postings
+    per query term, so its cost depends on the passages retrieved, not on how
+    many documents the user has.
+
+    Shards get their own IDs, recorded in a map from document_id to shard
+    (documents added before the map existed live in a shard named after their
+    document_id). A new revision of a document takes over the shard of the
+    previous one, so passages on unchanged pages keep their postings; the
+    previous document_id then no longer resolves to anything.
+    """
+
+    def __init__(self, user_id: int):
+        self.prefix = f"coll:{user_id}"
+
+    def _docs_key(self) -> str:
+        return f"{self.prefix}:docs"
+
+    def _chunks_key(self, document_id: str) -> str:
+        return f"{self.prefix}:doc:{document_id}:chunks"
+
+    def _shard_terms_key(self, document_id: str) -> str:
+        return f"{self.prefix}:doc:{document_id}:terms"
+
+    def _term_key(self, term: str) -> str:
+        return f"{self.prefix}:term:{term}"
+
+    def _lengths_key(self) -> str:
+        return f"{self.prefix}:lengths"
+
+    def _stats_key(self) -> str:
+        return f"{self.prefix}:stats"
+
+    def _shards_key(self) -> str:
+        return f"{self.prefix}:shards"
+
+    def _find(self, document_id: str) -> Tuple[Optional[str], Optional[dict]]:
+        """Shard ID and metadata of a document, or (None, None) if it is not (or no longer) in the collection"""
+        shard_id = get_redis().hget(self._shards_key(), document_id) or document_id
+        meta = get_redis().hget(self._docs_key(), shard_id)
+        if not meta:
+            return None, None
+        meta = json.loads(meta)
+        # a shard named after a document that was replaced now holds the new revision
+        if meta["document_id"] != document_id:
+            return None, None
+        return shard_id, meta
+
+    def _index_chunks(self, pipe, shard_id: str, chunks: List[Tuple[int, str]], start: int = 0) -> Tuple[set, int]:
+        """Queue the writes for new passages numbered from `start`, returning their terms and total length"""
+        shard_terms = set()
+        total_length = 0
+        for chunk_no, (page_number, text) in enumerate(chunks, start=start):
+            member = f"{shard_id}:{chunk_no}"
+            term_counts = Counter(tokenize(text))
+            length = sum(term_counts.values())
+            total_length += length
+            pipe.hset(self._chunks_key(shard_id), chunk_no, json.dumps({"page": page_number, "text": text}))
+            pipe.hset(self._lengths_key(), member, length)
+            for term, count in term_counts.items():
+                pipe.zadd(self._term_key(term), {member: count})
+            shard_terms.update(term_counts)
+        if shard_terms:
+            pipe.sadd(self._shard_terms_key(shard_id), *shard_terms)
+        return shard_terms, total_length
+
+    def list_documents(self) -> List[dict]:
+        documents = get_redis().hgetall(self._docs_key())
+        return sorted(
+            (json.loads(meta) for meta in documents.values()),
+            key=lambda meta: meta["added_at"],
+        )
+
+    def _get_shard(self, document_id: str) -> Tuple[str, dict]:
+        shard_id, meta = self._find(document_id)
+        if not meta:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Document not found in your collection."
+            )
+        return shard_id, meta
+
+    def get_document(self, document_id: str) -> dict:
+        return self._get_shard(document_id)[1]
+
+    def add_document(self, document_id: str, filename: str, pages: List[str]) -> dict:
+        """Index a document's passages; re-adding the same document replaces its shard"""
+        if self._find(document_id)[0]:
+            self.remove_document(document_id)
+
+        shard_id = uuid.uuid4().hex
+        chunks = chunk_pages(pages, settings.COLLECTION_CHUNK_CHARS)
+        pipe = get_redis().pipeline(transaction=False)
+        _, total_length = self._index_chunks(pipe, shard_id, chunks)
+
+        meta = {
+            "document_id": document_id,
+            "pdf_filename": filename,
+            "pages": len(pages),
+            "chunks": len(chunks),
+            "added_at": datetime.now().isoformat(),
+        }
+        pipe.hincrby(self._stats_key(), "chunks", len(chunks))
+        pipe.hincrby(self._stats_key(), "length", total_length)
+        pipe.hset(self._docs_key(), shard_id, json.dumps(meta))
+        pipe.hset(self._shards_key(), document_id, shard_id)
+        pipe.execute()
+        return meta
+
+    def update_document(self, previous_document_id: str, document_id: str, filename: str, pages: List[str], diff: dict) -> dict:
+        """Replace a document with its new revision, re-indexing only the pages that changed.
+
+        `diff` comes from revisions.diff_pages. Passages on unchanged pages keep
+        their postings and only get their page number updated if it moved.
+        """
+        shard_id, meta = self._get_shard(previous_document_id)
+        if document_id != previous_document_id and self._find(document_id)[0]:
+            self.remove_document(document_id)
+
+        moved = {previous: current for previous, current in diff["unchanged"]}
+        chunks = get_redis().hgetall(self._chunks_key(shard_id))
+        pipe = get_redis().pipeline(transaction=False)
+        kept = 0
+        removed_length = 0
+        for chunk_no, chunk in chunks.items():
+            chunk = json.loads(chunk)
+            if chunk["page"] in moved:
+                kept += 1
+                if moved[chunk["page"]] != chunk["page"]:
+                    pipe.hset(self._chunks_key(shard_id), chunk_no, json.dumps({"page": moved[chunk["page"]], "text": chunk["text"]}))
+                continue
+            member = f"{shard_id}:{chunk_no}"
+            term_counts = Counter(tokenize(chunk["text"]))
+            removed_length += sum(term_counts.values())
+            for term in term_counts:
+                pipe.zrem(self._term_key(term), member)
+            pipe.hdel(self._lengths_key(), member)
+            pipe.hdel(self._chunks_key(shard_id), chunk_no)
+
+        reindexed = sorted(set(range(1, len(pages) + 1)) - set(moved.values()))
+        new_chunks = chunk_pages(pages, settings.COLLECTION_CHUNK_CHARS, reindexed)
+        next_chunk_no = max(map(int, chunks), default=-1) + 1
+        _, added_length = self._index_chunks(pipe, shard_id, new_chunks, start=next_chunk_no)
+
+        meta.update({
+            "document_id": document_id,
+            "pdf_filename": filename,
+            "pages": len(pages),
+            "chunks": kept + len(new_chunks),
+            "pages_reindexed": len(reindexed),
+        })
+        pipe.hincrby(self._stats_key(), "chunks", kept + len(new_chunks) - len(chunks))
+        pipe.hincrby(self._stats_key(), "length", added_length - removed_length)
+        pipe.hset(self._docs_key(), shard_id, json.dumps(meta))
+        pipe.hdel(self._shards_key(), previous_document_id)
+        pipe.hset(self._shards_key(), document_id, shard_id)
+        pipe.execute()
+        return meta
+
+    def remove_document(self, document_id: str):
+        """Drop a document's shard and its postings"""
+        shard_id, _ = self._get_shard(document_id)
+        members = [f"{shard_id}:{chunk_no}" for chunk_no in get_redis().hkeys(self._chunks_key(shard_id))]
+        lengths = get_redis().hmget(self._lengths_key(), members) if members else []
+        terms = get_redis().smembers(self._shard_terms_key(shard_id))
+
+        pipe = get_redis().pipeline(transaction=False)
+        for term in terms:
+            pipe.zrem(self._term_key(term), *members)
+        if members:
+            pipe.hdel(self._lengths_key(), *members)
+        pipe.hincrby(self._stats_key(), "chunks", -len(members))
+        pipe.hincrby(self._stats_key(), "length", -sum(int(length or 0) for length in lengths))
+        pipe.delete(self._chunks_key(shard_id), self._shard_terms_key(shard_id))
+        pipe.hdel(self._docs_key(), shard_id)
+        pipe.hdel(self._shards_key(), document_id)
+        pipe.execute()
+
+    def search(self, question: str, top_k: int) -> List[dict]:
+        """Return the top passages across the collection, scored with BM25"""
+        terms = list(dict.fromkeys(tokenize(question)))[:settings.COLLECTION_MAX_QUERY_TERMS]
+        if not terms:
+            return []
+
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hgetall(self._stats_key())
+        for term in terms:
+            pipe.zcard(self._term_key(term))
+            pipe.zrevrange(self._term_key(term), 0, settings.COLLECTION_POSTINGS_PER_TERM - 1, withscores=True)
+        results = pipe.execute()
+        stats, results = results[0], results[1:]
+        total_chunks = int(stats.get("chunks", 0))
+        if not total_chunks:
+            return []
+        average_length = max(int(stats.get("length", 0)) / total_chunks, 1.0)
+
+        postings: Dict[str, List[Tuple[float, float]]] = defaultdict(list)
+        for i in range(len(terms)):
+            document_frequency, term_postings = results[2 * i], results[2 * i + 1]
+            idf = math.log(1 + (total_chunks - document_frequency + 0.5) / (document_frequency + 0.5))
+            for member, term_frequency in term_postings:
+                postings[member].append((idf, term_frequency))
+        if not postings:
+            return []
+
+        members = list(postings)
+        lengths = get_redis().hmget(self._lengths_key(), members)
+        scores = {}
+        for member, length in zip(members, lengths):
+            norm = K1 * (1 - B + B * int(length or 0) / average_length)
+            scores[member] = sum(idf * tf * (K1 + 1) / (tf + norm) for idf, tf in postings[member])
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+
+        pipe = get_redis().pipeline(transaction=False)
+        for member, _ in ranked:
+            shard_id, chunk_no = member.rsplit(":", 1)
+            pipe.hget(self._chunks_key(shard_id), chunk_no)
+        chunks = pipe.execute()
+        shard_ids = list({member.rsplit(":", 1)[0] for member, _ in ranked})
+        metas = get_redis().hmget(self._docs_key(), shard_ids) if shard_ids else []
+        documents = {shard_id: json.loads(meta) for shard_id, meta in zip(shard_ids, metas) if meta}
+
+        passages = []
+        for (member, score), chunk in zip(ranked, chunks):
+            shard_id = member.rsplit(":", 1)[0]
+            if not chunk or shard_id not in documents:
+                continue
+            chunk = json.loads(chunk)
+            passages.append({
+                "document_id": documents[shard_id]["document_id"],
+                "pdf_filename": documents[shard_id]["pdf_filename"],
+                "page": chunk["page"],
+                "score": round(score, 4),
+                "text": chunk["text"],
+            })
+        return passages
@@ -23,6 +23,7 @@ class Settings(BaseSettings):
     REDIS_HOST:str
     REDIS_PORT:int
     REDIS_PASSWORD:str
+    REDIS_MAX_CONNECTIONS: int = 50
     
     # LLM config
     MAX_FILE_SIZE: int = 10 * 1024 * 1024
@@ -31,5 +32,58 @@ class Settings(BaseSettings):
     MAX_TOKEN: int
     LLM_API_KEY: str
     TEMPERATURE:float
+    PROMPT_VERSION: str = "1"
+    ANSWER_CACHE_TTL: int = 3600
+    
+    # PDF extraction config
+    PDF_ENGINE: str = "pypdfium2"
+    PDF_FALLBACK_ENGINE: str = "pdfplumber"
+    PDF_FALLBACK_MIN_CHARS_PER_PAGE: int = 50
+    EXTRACTION_PROCESSES: int = 2
+    EXTRACTION_CACHE_TTL: int = 24 * 60 * 60
+    PAGE_CACHE_ENABLED: bool = True
+    
+    # Text normalization config
+    NORMALIZE_ENABLED: bool = True
+    NORMALIZE_STRIP_REPEATED: bool = True
+    NORMALIZE_STRIP_PAGE_NUMBERS: bool = True
+    NORMALIZE_REJOIN_HYPHENS: bool = True
+    NORMALIZE_COLLAPSE_WHITESPACE: bool = True
+    NORMALIZE_REPEAT_RATIO: float = 0.5
+    NORMALIZE_MIN_PAGE_CHARS: int = 20
+    
+    # Admission control config
+    LLM_MAX_CONCURRENCY: int = 8
+    EXTRACTION_MAX_CONCURRENCY: int = 4
+    ADMISSION_MAX_QUEUE: int = 32
+    ADMISSION_MAX_WAIT: float = 10.0
+    ADMISSION_SLOT_TTL: int = 120
+    USER_RATE_LIMIT_PER_MINUTE: float = 20
+    USER_RATE_LIMIT_BURST: int = 5
+    
+    # Chat session config
+    CHAT_SESSION_TTL: int = 24 * 60 * 60
+    CHAT_MAX_TURNS: int = 10
+    CHAT_KEEP_TURNS: int = 4
+    CHAT_SUMMARY_MAX_WORDS: int = 200
+    CHAT_SUMMARY_MAX_CHARS: int = 2000
+    
+    # Document collection config
+    COLLECTION_CHUNK_CHARS: int = 1200
+    COLLECTION_TOP_K: int = 6
+    COLLECTION_POSTINGS_PER_TERM: int = 200
+    COLLECTION_MAX_QUERY_TERMS: int = 16
+    
+    # Streaming pipeline config (start answering before a long PDF is fully extracted)
+    STREAM_PIPELINE_ENABLED: bool = True
+    STREAM_PIPELINE_TIME_BUDGET: float = 2.0
+    STREAM_PIPELINE_RELEVANT_CHARS: int = 6000
+    STREAM_PIPELINE_TERM_OVERLAP: float = 0.5
+    STREAM_PIPELINE_BATCH_PAGES: int = 8
+    
+    # Profiling config (comma separated admin emails may request profiles)
+    ADMIN_EMAILS: str = ""
+    PROFILE_SAMPLE_INTERVAL: float = 0.005
+    PROFILE_TTL: int = 60 * 60
     
 settings = Settings()
\ No newline at end of file
@@ -0,0 +1,236 @@
+import hashlib
+import importlib
+from functools import lru_cache
+from io import BytesIO, StringIO
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+class PDFEngine:
+    """Base class for PDF text-extraction engines.
+
+    An engine turns raw PDF bytes into one text string per page. The PDF
+    libraries are imported inside the engines so only the ones in use get loaded.
+    """
+
+    name: str = ""
+    modules: Tuple[str, ...] = ()
+
+    def iter_pages(self, file_content: bytes, page_numbers: Optional[Iterable[int]] = None) -> Iterator[str]:
+        """Yield the text of each page in document order, or only of the given 0-based pages
+        (page numbers past the end of the document are skipped)"""
+        raise NotImplementedError
+
+    def extract_pages(self, file_content: bytes, page_numbers: Optional[Iterable[int]] = None) -> List[str]:
+        """Extract the text of every page, or only of the given 0-based pages"""
+        return list(self.iter_pages(file_content, page_numbers))
+
+
+class PdfplumberEngine(PDFEngine):
+    """pdfplumber with full layout analysis (slowest, best quality)"""
+
+    name = "pdfplumber"
+    modules = ("pdfplumber",)
+
+    def iter_pages(self, file_content: bytes, page_numbers: Optional[Iterable[int]] = None) -> Iterator[str]:
+        import pdfplumber
+
+        with pdfplumber.open(BytesIO(file_content)) as pdf:
+            count = len(pdf.pages)
+            indexes = sorted(i for i in page_numbers if i < count) if page_numbers is not None else range(count)
+            for index in indexes:
+                page = pdf.pages[index]
+                yield page.extract_text() or ""
+                page.close()
+
+
+class Pypdfium2Engine(PDFEngine):
+    """PDFium text layer through pypdfium2 (fastest)"""
+
+    name = "pypdfium2"
+    modules = ("pypdfium2",)
+
+    def iter_pages(self, file_content: bytes, page_numbers: Optional[Iterable[int]] = None) -> Iterator[str]:
+        import pypdfium2
+
+        pdf = pypdfium2.PdfDocument(file_content)
+        try:
+            count = len(pdf)
+            indexes = sorted(i for i in page_numbers if i < count) if page_numbers is not None else range(count)
+            for index in indexes:
+                page = pdf[index]
+                textpage = page.get_textpage()
+                try:
+                    yield textpage.get_text_range().replace("\r\n", "\n")
+                finally:
+                    textpage.close()
+                    page.close()
+        finally:
+            pdf.close()
+
+
+@lru_cache(maxsize=None)
+def _line_text_converter():
+    """TextConverter that breaks lines and words by glyph position.
+
+    Without layout analysis pdfminer emits the glyphs of a page back to back,
+    so the last word of a line runs into the first word of the next one. This
+    writes a newline when the baseline moves and a space at word-sized gaps,
+    which is much cheaper than grouping glyphs into text boxes.
+    """
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LTChar, LTContainer
+
+    class LineTextConverter(TextConverter):
+        def receive_layout(self, ltpage):
+            previous = None
+
+            def render(item):
+                nonlocal previous
+                if isinstance(item, LTContainer):
+                    for child in item:
+                        render(child)
+                elif isinstance(item, LTChar):
+                    if previous is not None:
+                        height = max(item.height, previous.height, 1.0)
+                        if abs(item.y0 - previous.y0) > height / 2:
+                            self.write_text("\n")
+                        elif (item.x0 - previous.x1 > height * 0.15 or item.x0 < previous.x0) \
+                                and not item.get_text().isspace() and not previous.get_text().isspace():
+                            self.write_text(" ")
+                    self.write_text(item.get_text())
+                    previous = item
+
+            render(ltpage)
+            self.write_text("\f")
+
+    return LineTextConverter
+
+
+class PdfminerEngine(PDFEngine):
+    """pdfminer.six with layout analysis turned off"""
+
+    name = "pdfminer"
+    modules = ("pdfminer.converter", "pdfminer.layout", "pdfminer.pdfinterp", "pdfminer.pdfpage")
+
+    def iter_pages(self, file_content: bytes, page_numbers: Optional[Iterable[int]] = None) -> Iterator[str]:
+        from pdfminer.pdfinterp import PDFPageInterpreter, PDFResourceManager
+        from pdfminer.pdfpage import PDFPage
+
+        resource_manager = PDFResourceManager()
+        output = StringIO()
+        with _line_text_converter()(resource_manager, output, laparams=None) as converter:
+            interpreter = PDFPageInterpreter(resource_manager, converter)
+            pagenos = set(page_numbers) if page_numbers is not None else None
+            remaining = len(pagenos) if pagenos is not None else None
+            for page in PDFPage.get_pages(BytesIO(file_content), pagenos=pagenos):
+                interpreter.process_page(page)
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate()
+                if remaining is not None:
+                    remaining -= 1
+                    # get_pages would otherwise walk the rest of the page tree for nothing
+                    if not remaining:
+                        return
+
+
+PDF_ENGINES: Dict[str, PDFEngine] = {
+    engine.name: engine
+    for engine in (PdfplumberEngine(), Pypdfium2Engine(), PdfminerEngine())
+}
+
+
+def get_engine(name: str) -> PDFEngine:
+    """Look up a registered engine by name"""
+    try:
+        return PDF_ENGINES[name]
+    except KeyError:
+        raise ValueError(
+            f"Unsupported PDF engine: {name}. Choose one of: {', '.join(PDF_ENGINES)}"
+        )
+
+
+def _object_digest(obj, cache: Dict[int, bytes]) -> bytes:
+    """SHA-256 of a PDF object with every reference it holds resolved, streams hashed as stored.
+
+    Indirect objects are hashed once per document (fonts are usually shared by
+    many pages) and `cache` maps their object numbers to their digests.
+    """
+    from pdfminer.pdftypes import PDFObjRef, PDFStream
+
+    if isinstance(obj, PDFObjRef):
+        if obj.objid not in cache:
+            # a placeholder first, so a reference cycle ends instead of recursing
+            cache[obj.objid] = b""
+            cache[obj.objid] = _object_digest(obj.resolve(), cache)
+        return cache[obj.objid]
+    digest = hashlib.sha256()
+    if isinstance(obj, PDFStream):
+        digest.update(_object_digest(obj.attrs, cache))
+        digest.update(obj.get_rawdata() or b"")
+    elif isinstance(obj, dict):
+        for key in sorted(obj):
+            digest.update(str(key).encode())
+            digest.update(_object_digest(obj[key], cache))
+    elif isinstance(obj, list):
+        for item in obj:
+            digest.update(_object_digest(item, cache))
+    else:
+        digest.update(repr(obj).encode())
+    return digest.digest()
+
+
+def _update_with_fonts(digest, resources, cache: Dict[int, bytes]):
+    """Add the fonts of a resource dictionary, since the same content stream draws
+    different text when a font's encoding or ToUnicode map changes"""
+    from pdfminer.pdftypes import resolve1
+
+    fonts = resolve1((resolve1(resources) or {}).get("Font")) or {}
+    for name in sorted(fonts):
+        digest.update(name.encode())
+        digest.update(_object_digest(fonts[name], cache))
+
+
+def page_content_hashes(file_content: bytes) -> List[str]:
+    """SHA-256 of each page's content streams and fonts, in page order.
+
+    Form XObjects drawn by the page are included, since some producers put the
+    whole page body in one. Fonts are included with everything they reference
+    (encoding, ToUnicode map, embedded font file), since text is extracted
+    through them. Pages with equal hashes draw the same text, so a revised PDF
+    only needs its pages with new hashes extracted. The streams are hashed as
+    stored, without decoding them, which is several times cheaper; a page
+    re-encoded by a different writer only costs a cache miss. Returns an empty
+    list when the file cannot be parsed.
+    """
+    from pdfminer.pdfpage import PDFPage
+    from pdfminer.pdftypes import PDFStream, resolve1
+
+    hashes = []
+    font_cache: Dict[int, bytes] = {}
+    try:
+        for page in PDFPage.get_pages(BytesIO(file_content)):
+            digest = hashlib.sha256()
+            for stream in page.contents:
+                stream = resolve1(stream)
+                if isinstance(stream, PDFStream):
+                    digest.update(stream.get_rawdata())
+            resources = resolve1(page.resources) or {}
+            _update_with_fonts(digest, resources, font_cache)
+            xobjects = resolve1(resources.get("XObject")) or {}
+            for name in sorted(xobjects):
+                xobject = resolve1(xobjects[name])
+                if isinstance(xobject, PDFStream) and getattr(xobject.get("Subtype"), "name", None) == "Form":
+                    digest.update(name.encode())
+                    digest.update(xobject.get_rawdata())
+                    _update_with_fonts(digest, xobject.get("Resources"), font_cache)
+            hashes.append(digest.hexdigest())
+    except Exception as e:
+        return []
+    return hashes
+
+def preload_engines():
+    """Import every engine's PDF library ahead of the first request"""
+    for engine in PDF_ENGINES.values():
+        for module in engine.modules:
+            importlib.import_module(module)
@@ -0,0 +1,284 @@
+import asyncio
+import math
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
+from fastapi import HTTPException, status
+from app.core.config import settings
+from app.core.redis import get_redis
+
+# Admission control for LLM calls and PDF extraction.
+# All state lives in Redis so every worker process shares the same limits.
+
+# KEYS: holders zset, waiters zset, holder start times hash
+# ARGV: now, limit, token, lease_ttl, max_wait
+# Returns 0 when the slot is granted, -1 when the caller is no longer queued,
+# otherwise its position in the queue.
+_ACQUIRE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local expired = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)
+if #expired > 0 then
+    redis.call('ZREM', KEYS[1], unpack(expired))
+    redis.call('HDEL', KEYS[3], unpack(expired))
+end
+redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now - tonumber(ARGV[5]) - 1)
+local free = tonumber(ARGV[2]) - redis.call('ZCARD', KEYS[1])
+local rank = redis.call('ZRANK', KEYS[2], ARGV[3])
+if rank == false then
+    return -1
+end
+if rank < free then
+    redis.call('ZADD', KEYS[1], now + tonumber(ARGV[4]), ARGV[3])
+    redis.call('HSET', KEYS[3], ARGV[3], now)
+    redis.call('ZREM', KEYS[2], ARGV[3])
+    return 0
+end
+return rank - math.max(free, 0) + 1
+"""
+
+# KEYS: waiters zset
+# ARGV: now, max_queue, token, max_wait
+# Returns the queue depth ahead of the caller, or -1 when the queue is full.
+_ENQUEUE_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - tonumber(ARGV[4]) - 1)
+local depth = redis.call('ZCARD', KEYS[1])
+if depth >= tonumber(ARGV[2]) then
+    return -1
+end
+redis.call('ZADD', KEYS[1], now, ARGV[3])
+redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[4])) + 60)
+return depth
+"""
+
+# KEYS: bucket hash
+# ARGV: now, refill rate (tokens/sec), capacity, cost
+# Returns {allowed, seconds until enough tokens are available}.
+_TOKEN_BUCKET_SCRIPT = """
+local now = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local capacity = tonumber(ARGV[3])
+local cost = tonumber(ARGV[4])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - ts, 0) * rate)
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+def _run_script(source: str, keys: list, args: list):
+    # Script objects only hash the source, so binding to the current client per call is cheap
+    return get_redis().register_script(source)(keys=keys, args=args)
+
+
+def _retry_after(seconds: float) -> dict:
+    return {"Retry-After": str(max(1, math.ceil(seconds)))}
+
+
+class Slot:
+    """A granted concurrency slot. Releasing it more than once is a no-op."""
+
+    def __init__(self, limiter: "ConcurrencyLimiter", token: str):
+        self.limiter = limiter
+        self.token = token
+        self.acquired_at = time.monotonic()
+        self.renewed_at = self.acquired_at
+        self.released = False
+        self._lock = threading.Lock()
+
+    def keep_alive(self):
+        """Extend the lease while the slot is in use, e.g. between streamed chunks.
+
+        Renews at most every third of the lease, so it is cheap to call often.
+        """
+        now = time.monotonic()
+        if self.released or now - self.renewed_at < self.limiter.lease_ttl / 3:
+            return
+        self.renewed_at = now
+        self.limiter.renew(self.token)
+
+    def release(self):
+        with self._lock:
+            if self.released:
+                return
+            self.released = True
+        self.limiter.release(self.token, time.monotonic() - self.acquired_at)
+
+
+class ConcurrencyLimiter:
+    """Global semaphore with a bounded, deadline-aware FIFO wait queue.
+
+    Slots are leases in a Redis sorted set, so a crashed worker can only hold
+    a slot until its lease expires; long-running holders renew their lease.
+    A request whose estimated wait is longer than `max_wait` is rejected with
+    a 503 and a Retry-After header instead of queueing. The estimate uses how
+    long the current holders have already run against the average hold time.
+    Once queued, a request waits until it gets a slot or its deadline passes.
+    """
+
+    POLL_INTERVAL = 0.05
+
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float, lease_ttl: int):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.lease_ttl = lease_ttl
+        self.holders_key = f"limiter:{name}:holders"
+        self.waiters_key = f"limiter:{name}:waiters"
+        self.hold_time_key = f"limiter:{name}:hold_time"
+        self.started_key = f"limiter:{name}:started"
+
+    def average_hold_time(self) -> float:
+        value = get_redis().get(self.hold_time_key)
+        return float(value) if value else 1.0
+
+    def estimate_wait(self, position: int) -> float:
+        """Expected wait for the waiter at `position` (1-based, counted past the free slots).
+
+        Holders that have already run for a while are expected to finish
+        sooner, so the first waiters are charged what is left of the
+        average hold, not a full one.
+        """
+        average = self.average_hold_time()
+        now = time.time()
+        started = get_redis().hvals(self.started_key)
+        remaining = sorted(max(average - (now - float(start)), self.POLL_INTERVAL) for start in started)
+        if not remaining:
+            return average * math.ceil(position / self.limit)
+        rounds, index = divmod(position - 1, self.limit)
+        return remaining[min(index, len(remaining) - 1)] + rounds * average
+
+    def _reject(self, retry_after: float):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The service is busy. Please retry shortly.",
+            headers=_retry_after(retry_after),
+        )
+
+    async def acquire(self) -> Slot:
+        """Wait for a slot, or raise 503 when the wait would exceed the deadline"""
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + self.max_wait
+        depth = _run_script(
+            _ENQUEUE_SCRIPT,
+            keys=[self.waiters_key],
+            args=[time.time(), self.max_queue, token, self.max_wait],
+        )
+        if depth < 0:
+            self._reject(self.average_hold_time())
+
+        try:
+            first_check = True
+            while True:
+                position = _run_script(
+                    _ACQUIRE_SCRIPT,
+                    keys=[self.holders_key, self.waiters_key, self.started_key],
+                    args=[time.time(), self.limit, token, self.lease_ttl, self.max_wait],
+                )
+                if position == 0:
+                    return Slot(self, token)
+                if position < 0:
+                    # our queue entry was purged as stale, nothing left to wait for
+                    self._reject(self.average_hold_time())
+
+                # only judged on entry; a request that was let into the queue
+                # then waits until its own deadline
+                if first_check:
+                    first_check = False
+                    estimated_wait = self.estimate_wait(position)
+                    if estimated_wait > self.max_wait:
+                        self._reject(estimated_wait)
+                if time.monotonic() >= deadline:
+                    self._reject(self.estimate_wait(position))
+                await asyncio.sleep(self.POLL_INTERVAL)
+        except BaseException:
+            get_redis().zrem(self.waiters_key, token)
+            raise
+
+    def renew(self, token: str):
+        """Push a held lease's expiry out by another lease_ttl (no-op once released)"""
+        get_redis().zadd(self.holders_key, {token: time.time() + self.lease_ttl}, xx=True)
+
+    def release(self, token: str, held_for: float):
+        pipe = get_redis().pipeline()
+        pipe.zrem(self.holders_key, token)
+        pipe.hdel(self.started_key, token)
+        pipe.get(self.hold_time_key)
+        _, _, previous = pipe.execute()
+        # exponentially weighted average keeps the wait estimate current
+        average = held_for if previous is None else 0.8 * float(previous) + 0.2 * held_for
+        get_redis().set(self.hold_time_key, average, ex=3600)
+
+    async def _keep_alive(self, slot: Slot):
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            slot.keep_alive()
+
+    @asynccontextmanager
+    async def slot(self):
+        slot = await self.acquire()
+        # the body may wait on a worker thread for longer than one lease
+        renewal = asyncio.create_task(self._keep_alive(slot))
+        try:
+            yield slot
+        finally:
+            renewal.cancel()
+            slot.release()
+
+
+class TokenBucket:
+    """Per-user token bucket; an empty bucket is rejected with a 429"""
+
+    def __init__(self, name: str, rate_per_minute: float, burst: int):
+        self.name = name
+        self.rate = rate_per_minute / 60.0
+        self.capacity = burst
+
+    def consume(self, user_id, cost: int = 1):
+        allowed, retry_after = _run_script(
+            _TOKEN_BUCKET_SCRIPT,
+            keys=[f"ratelimit:{self.name}:{user_id}"],
+            args=[time.time(), self.rate, self.capacity, cost],
+        )
+        if not int(allowed):
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests. Please slow down.",
+                headers=_retry_after(float(retry_after)),
+            )
+
+
+llm_limiter = ConcurrencyLimiter(
+    "llm",
+    limit=settings.LLM_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait=settings.ADMISSION_MAX_WAIT,
+    lease_ttl=settings.ADMISSION_SLOT_TTL,
+)
+
+extraction_limiter = ConcurrencyLimiter(
+    "extraction",
+    limit=settings.EXTRACTION_MAX_CONCURRENCY,
+    max_queue=settings.ADMISSION_MAX_QUEUE,
+    max_wait=settings.ADMISSION_MAX_WAIT,
+    lease_ttl=settings.ADMISSION_SLOT_TTL,
+)
+
+user_rate_limiter = TokenBucket(
+    "ask",
+    rate_per_minute=settings.USER_RATE_LIMIT_PER_MINUTE,
+    burst=settings.USER_RATE_LIMIT_BURST,
+)
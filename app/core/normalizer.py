@@ -0,0 +1,257 @@
+import re
+import string
+from collections import Counter
+from functools import lru_cache
+from typing import Iterable, List, Set, Tuple
+
+# the lookbehind sits after the literal "-" so the scan only stops at hyphens
+HYPHEN_BREAK_RE = re.compile(r"-(?<=\w-)[ \t]*\n[ \t]*(?=[a-z])")
+WORD_RE = re.compile(r"\w+")
+# punctuation to spaces, so str.split yields the words (several times faster than WORD_RE.findall)
+PUNCTUATION_TO_SPACE = str.maketrans({char: " " for char in string.punctuation if char != "_"})
+PAGE_NUMBER_RE = re.compile(
+    r"^(?:page\s*)?[-–—]?\s*\d{1,4}\s*[-–—]?(?:\s*(?:of|/)\s*\d{1,4})?$",
+    re.IGNORECASE,
+)
+# a page label at the end of a header/footer line: "page 3", "3 of 10", "3/10", " | 3", " – 3"
+PAGE_LABEL_RE = re.compile(
+    r"(?:\bpage\s*\d{1,4}(?:\s*(?:of|/)\s*\d{1,4})?|\b\d{1,4}\s*(?:of|/)\s*\d{1,4}|\s[|•·–—-]\s+\d{1,4})\s*$",
+    re.IGNORECASE,
+)
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens with tiktoken when installed, otherwise estimate ~4 characters per token"""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class TextNormalizer:
+    """Strips boilerplate from extracted page text before it is sent to the LLM.
+
+    Every step is a single pass over the text, so the whole pipeline is linear
+    in the size of the document:
+      - lines repeated at the top or at the bottom of many pages
+        (headers/footers), compared exactly except for a trailing page label,
+        so "Report | Page 3 of 10" lines match but footers carrying other
+        numbers (balances, totals) are kept
+      - page-number lines on the outermost line of a page; a bare number
+        ("42") only when it follows the page sequence across pages, so a
+        trailing table value or year is kept
+      - words hyphenated across a line break, rejoined only when the joined
+        word appears elsewhere in the document ("implemen-/tation"), otherwise
+        kept as a hyphenated compound ("well-/known" -> "well-known")
+      - runs of spaces and blank lines
+      - pages left with almost no text
+    """
+
+    EDGE_LINES = 3
+    MIN_PAGES_FOR_REPEATS = 3
+
+    def __init__(
+        self,
+        strip_repeated: bool = True,
+        strip_page_numbers: bool = True,
+        rejoin_hyphens: bool = True,
+        collapse_whitespace: bool = True,
+        repeat_ratio: float = 0.5,
+        min_page_chars: int = 20,
+    ):
+        self.strip_repeated = strip_repeated
+        self.strip_page_numbers = strip_page_numbers
+        self.rejoin_hyphens = rejoin_hyphens
+        self.collapse_whitespace = collapse_whitespace
+        self.repeat_ratio = repeat_ratio
+        self.min_page_chars = min_page_chars
+
+    @classmethod
+    def from_settings(cls) -> "TextNormalizer":
+        from app.core.config import settings
+
+        if not settings.NORMALIZE_ENABLED:
+            return cls(False, False, False, False, min_page_chars=1)
+        return cls(
+            strip_repeated=settings.NORMALIZE_STRIP_REPEATED,
+            strip_page_numbers=settings.NORMALIZE_STRIP_PAGE_NUMBERS,
+            rejoin_hyphens=settings.NORMALIZE_REJOIN_HYPHENS,
+            collapse_whitespace=settings.NORMALIZE_COLLAPSE_WHITESPACE,
+            repeat_ratio=settings.NORMALIZE_REPEAT_RATIO,
+            min_page_chars=settings.NORMALIZE_MIN_PAGE_CHARS,
+        )
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the configuration, so cached output is not reused after it changes"""
+        flags = "".join(str(int(flag)) for flag in (
+            self.strip_repeated, self.strip_page_numbers, self.rejoin_hyphens, self.collapse_whitespace
+        ))
+        return f"v3-{flags}-{self.repeat_ratio}-{self.min_page_chars}"
+
+    @staticmethod
+    def _signature(line: str) -> str:
+        line = " ".join(line.lower().split())
+        # every page label ends in a digit, so most lines skip the regexes
+        if not line[-1:].isdigit():
+            return line
+        # bare numbers are matched exactly; _drop_page_numbers decides whether they are page numbers
+        if line.isdigit():
+            return line
+        if PAGE_NUMBER_RE.match(line):
+            return "#"
+        return PAGE_LABEL_RE.sub("#", line)
+
+    @staticmethod
+    def _first_lines(lines: List[str], indexes: Iterable[int], count: int, drop: Set[int] = frozenset()) -> List[int]:
+        """Up to `count` indexes of non-empty, not dropped lines, scanning `indexes` in order"""
+        found = []
+        for i in indexes:
+            if i not in drop and lines[i].strip():
+                found.append(i)
+                if len(found) == count:
+                    break
+        return found
+
+    def _edge_indexes(self, lines: List[str]) -> Tuple[List[int], List[int]]:
+        """Indexes of the first few and of the last few non-empty lines of a page"""
+        top = self._first_lines(lines, range(len(lines)), self.EDGE_LINES)
+        bottom = self._first_lines(lines, range(len(lines) - 1, -1, -1), self.EDGE_LINES)
+        return top, bottom[::-1]
+
+    @staticmethod
+    def _outer_indexes(lines: List[str], drop: Set[int]) -> List[int]:
+        """Indexes of the first and the last non-empty line not already dropped"""
+        first = TextNormalizer._first_lines(lines, range(len(lines)), 1, drop)
+        last = TextNormalizer._first_lines(lines, range(len(lines) - 1, -1, -1), 1, drop)
+        return list(dict.fromkeys(first + last))
+
+    def _drop_page_numbers(self, pages_lines: List[List[str]], drops: List[Set[int]]) -> int:
+        """Add page-number lines to each page's drop set, returning how many were added"""
+        removed = 0
+        bare = []
+        offsets = Counter()
+        for index, (lines, drop) in enumerate(zip(pages_lines, drops)):
+            for i in self._outer_indexes(lines, drop):
+                line = lines[i].strip()
+                if not PAGE_NUMBER_RE.match(line):
+                    continue
+                if line.isdigit():
+                    bare.append((index, i, int(line)))
+                    offsets[int(line) - index] += 1
+                else:
+                    drop.add(i)
+                    removed += 1
+        # a bare number is a page number when it is the page's position plus
+        # an offset shared with other pages (front matter shifts the numbering)
+        if offsets:
+            offset, count = offsets.most_common(1)[0]
+            if count >= 2:
+                for index, i, number in bare:
+                    if number - index == offset:
+                        drops[index].add(i)
+                        removed += 1
+        return removed
+
+    def _repeated_signatures(self, pages_lines: List[List[str]]) -> Tuple[set, set]:
+        """Signatures repeated at the top of pages and at the bottom of pages, counted separately"""
+        if not self.strip_repeated or len(pages_lines) < self.MIN_PAGES_FOR_REPEATS:
+            return set(), set()
+        top_counts, bottom_counts = Counter(), Counter()
+        for lines in pages_lines:
+            top, bottom = self._edge_indexes(lines)
+            top_counts.update({self._signature(lines[i]) for i in top})
+            bottom_counts.update({self._signature(lines[i]) for i in bottom})
+        threshold = max(2, self.repeat_ratio * len(pages_lines))
+        return tuple(
+            {signature for signature, count in counts.items() if count >= threshold and signature}
+            for counts in (top_counts, bottom_counts)
+        )
+
+    @staticmethod
+    def _rejoin_hyphens(pages: List[str]) -> List[str]:
+        """Undo line-break hyphenation without merging real compounds like "well-known" """
+        vocabulary = None
+
+        def rejoin(page: str) -> str:
+            def replace(match) -> str:
+                nonlocal vocabulary
+                if vocabulary is None:
+                    # built on the first break only; most pages have none
+                    vocabulary = set("\n".join(pages).lower().translate(PUNCTUATION_TO_SPACE).split())
+                start = match.start()
+                while start > 0 and (page[start - 1].isalnum() or page[start - 1] == "_"):
+                    start -= 1
+                head = page[start:match.start()]
+                tail = WORD_RE.match(page, match.end()).group()
+                return "" if (head + tail).lower() in vocabulary else "-"
+            return HYPHEN_BREAK_RE.sub(replace, page)
+
+        return [rejoin(page) for page in pages]
+
+    def normalize_pages(self, pages: List[str]) -> Tuple[List[str], dict]:
+        """Normalize each page, returning per-step counters.
+
+        Dropped pages come back as empty strings so page numbers stay aligned.
+        """
+        if self.rejoin_hyphens:
+            pages = self._rejoin_hyphens(pages)
+        pages_lines = [page.split("\n") for page in pages]
+        repeated_top, repeated_bottom = self._repeated_signatures(pages_lines)
+
+        counters = {"repeated_lines_removed": 0, "page_number_lines_removed": 0, "pages_dropped": 0}
+        drops = []
+        for lines in pages_lines:
+            drop = set()
+            if repeated_top or repeated_bottom:
+                top, bottom = self._edge_indexes(lines)
+                drop.update(i for i in top if self._signature(lines[i]) in repeated_top)
+                drop.update(i for i in bottom if self._signature(lines[i]) in repeated_bottom)
+                counters["repeated_lines_removed"] += len(drop)
+            drops.append(drop)
+        if self.strip_page_numbers:
+            counters["page_number_lines_removed"] = self._drop_page_numbers(pages_lines, drops)
+
+        normalized = []
+        for lines, drop in zip(pages_lines, drops):
+            kept = (line for i, line in enumerate(lines) if i not in drop)
+            if self.collapse_whitespace:
+                text = BLANK_LINES_RE.sub("\n\n", "\n".join(" ".join(line.split()) for line in kept))
+            else:
+                text = "\n".join(kept)
+            text = text.strip()
+
+            if len(text) < self.min_page_chars:
+                counters["pages_dropped"] += 1
+                text = ""
+            normalized.append(text)
+        return normalized, counters
+
+    def normalize(self, pages: List[str]) -> Tuple[List[str], dict]:
+        """Normalize a document's pages and report how many characters and tokens were removed"""
+        original = "\n".join(page for page in pages if page).strip()
+        normalized_pages, counters = self.normalize_pages(pages)
+        text = "\n".join(page for page in normalized_pages if page)
+
+        tokens_before = count_tokens(original)
+        tokens_after = count_tokens(text)
+        stats = {
+            "characters_before": len(original),
+            "characters_after": len(text),
+            "characters_removed": len(original) - len(text),
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "tokens_removed": tokens_before - tokens_after,
+            **counters,
+        }
+        return normalized_pages, stats
@@ -0,0 +1,172 @@
+import asyncio
+import math
+import multiprocessing
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+from app.core.collection import tokenize
+from app.core.config import settings
+from app.core.extractors import PDFEngine, preload_engines
+from app.core.profiling import record_worker_cpu
+
+
+def _timed_call(func, args, kwargs):
+    """Run func in a pool worker and return its result with the CPU time it used there"""
+    cpu_start = time.thread_time()
+    result = func(*args, **kwargs)
+    return result, time.thread_time() - cpu_start
+
+
+class ExtractionPool:
+    """Process pool that keeps CPU-bound PDF parsing off the event loop.
+
+    Started and stopped by the FastAPI lifespan. With EXTRACTION_PROCESSES=0,
+    or before the pool is started, work runs on a single thread: PDFium is not
+    thread-safe, and the pure-Python engines gain nothing from more threads
+    under the GIL.
+    """
+
+    _executor: Optional[ProcessPoolExecutor] = None
+    _thread: Optional[ThreadPoolExecutor] = None
+
+    @classmethod
+    def start(cls):
+        if cls._executor is None and settings.EXTRACTION_PROCESSES > 0:
+            cls._executor = ProcessPoolExecutor(
+                max_workers=settings.EXTRACTION_PROCESSES,
+                # never fork a worker that already runs an event loop and holds sockets
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=preload_engines,
+            )
+
+    @classmethod
+    def shutdown(cls):
+        if cls._executor is not None:
+            cls._executor.shutdown(wait=False, cancel_futures=True)
+            cls._executor = None
+        if cls._thread is not None:
+            cls._thread.shutdown(wait=False, cancel_futures=True)
+            cls._thread = None
+
+    @classmethod
+    def executor(cls) -> Executor:
+        if cls._executor is not None:
+            return cls._executor
+        if cls._thread is None:
+            cls._thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-extraction")
+        return cls._thread
+
+    @classmethod
+    async def run(cls, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        result, cpu_seconds = await loop.run_in_executor(cls.executor(), partial(_timed_call, func, args, kwargs))
+        record_worker_cpu(cpu_seconds)
+        return result
+
+
+def extract_page_batch(engine: PDFEngine, file_content: bytes, page_numbers: List[int]) -> Optional[List[str]]:
+    """Text of the given 0-based pages that exist; fewer pages mean the document ended.
+
+    Returns None when a page could not be read.
+    """
+    try:
+        return [page.strip() for page in engine.iter_pages(file_content, page_numbers)]
+    except Exception as e:
+        return None
+
+
+def page_relevance(page: str, terms: set) -> int:
+    """Number of distinct question terms that appear on a page"""
+    return len(terms.intersection(tokenize(page)))
+
+
+async def extract_for_question(
+    file_content: bytes,
+    engine: PDFEngine,
+    question: str,
+    cached_pages: Optional[Dict[int, str]] = None,
+    page_count: Optional[int] = None,
+) -> Tuple[List[str], bool]:
+    """Extract pages in order until there is enough to answer the question.
+
+    Pages are parsed in batches of STREAM_PIPELINE_BATCH_PAGES on the extraction
+    pool, with the next batch parsed while the previous one is scored against
+    the question. Pages found in `cached_pages` (by 0-based index) are not parsed
+    again. No more batches are submitted once pages containing enough of the
+    question terms add up to STREAM_PIPELINE_RELEVANT_CHARS, or once
+    STREAM_PIPELINE_TIME_BUDGET seconds have passed, whichever comes first.
+    Callers hold an extraction_limiter slot.
+
+    Returns the pages read so far and whether they cover the whole document.
+    When a page cannot be read, or the engine disagrees with `page_count`, no
+    pages are returned, like PDFExtractor.run_engine, so the caller falls back
+    to a full extraction.
+    """
+    cached_pages = cached_pages or {}
+    terms = set(tokenize(question))
+    needed = max(1, math.ceil(len(terms) * settings.STREAM_PIPELINE_TERM_OVERLAP))
+    batch_size = max(1, settings.STREAM_PIPELINE_BATCH_PAGES)
+    loop = asyncio.get_running_loop()
+
+    async def read_batch(start: int) -> Optional[List[str]]:
+        end = start + batch_size if page_count is None else min(start + batch_size, page_count)
+        missing = [index for index in range(start, end) if index not in cached_pages]
+        extracted = {}
+        if missing:
+            texts = await ExtractionPool.run(extract_page_batch, engine, file_content, missing)
+            if texts is None or (page_count is not None and len(texts) != len(missing)):
+                return None
+            extracted = dict(zip(missing, texts))
+        pages = []
+        for index in range(start, end):
+            page = cached_pages[index] if index in cached_pages else extracted.get(index)
+            if page is None:
+                break
+            pages.append(page)
+        return pages
+
+    def submit(start: int) -> asyncio.Future:
+        return asyncio.ensure_future(read_batch(start))
+
+    pages = []
+    relevant_chars = 0
+    complete = False
+    deadline = loop.time() + settings.STREAM_PIPELINE_TIME_BUDGET
+    batches = deque([submit(0)])
+    next_start = batch_size
+    try:
+        while True:
+            # the time budget only applies once there is some text to answer from
+            timeout = max(deadline - loop.time(), 0) if pages else None
+            done, _ = await asyncio.wait({batches[0]}, timeout=timeout)
+            if not done:
+                break
+            batch = batches.popleft().result()
+            if batch is None:
+                return [], False
+            pages.extend(batch)
+            if len(batch) < batch_size:
+                complete = True
+                break
+            if terms:
+                relevant_chars += sum(len(page) for page in batch if page_relevance(page, terms) >= needed)
+                if relevant_chars >= settings.STREAM_PIPELINE_RELEVANT_CHARS:
+                    break
+            # keep one batch parsing ahead of the one being waited on
+            while len(batches) < 2:
+                batches.append(submit(next_start))
+                next_start += batch_size
+
+        # batches already parsed when extraction stopped cost nothing more to include
+        while not complete and batches and batches[0].done():
+            batch = batches.popleft().result()
+            if batch is None:
+                break
+            pages.extend(batch)
+            complete = len(batch) < batch_size
+    finally:
+        for task in batches:
+            task.cancel()
+    return pages, complete
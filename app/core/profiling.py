@@ -0,0 +1,174 @@
+import json
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import AsyncIterator, Iterable, Iterator, Optional
+from app.core.config import settings
+from app.core.redis import get_redis
+
+# CPU seconds measured inside ExtractionPool workers during the current profiler stage
+_worker_cpu: ContextVar[Optional[list]] = ContextVar("worker_cpu", default=None)
+
+
+def record_worker_cpu(seconds: float):
+    """Credit CPU time spent in a pool worker to the stage being profiled, if any"""
+    totals = _worker_cpu.get()
+    if totals is not None:
+        totals.append(seconds)
+
+
+class NullProfiler:
+    """Stand-in used when profiling is off; every hook is a no-op"""
+
+    request_id: Optional[str] = None
+
+    def stage(self, name: str):
+        return nullcontext()
+
+    def wrap_iter(self, iterable: Iterable, name: str) -> Iterable:
+        return iterable
+
+    def finish(self):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
+
+
+class RequestProfiler:
+    """Sampling profiler for a single request.
+
+    A background thread samples the stacks of the threads that worked on the
+    request every PROFILE_SAMPLE_INTERVAL seconds and aggregates them as
+    collapsed stacks ("frame;frame;frame count"), the input format of
+    flamegraph.pl and speedscope. Stages record wall and CPU time; CPU time
+    includes work the stage handed to ExtractionPool, which the worker measures
+    itself (stack samples are not taken in worker processes). On finish the
+    profile is stored in Redis under the request ID.
+
+    The event-loop thread is shared, so samples taken there can include other
+    requests that were running at the same time.
+    """
+
+    def __init__(self, path: str):
+        self.request_id = uuid.uuid4().hex
+        self.path = path
+        self.started_at = time.time()
+        self.stages = []
+        self.samples = Counter()
+        self.threads = {threading.get_ident()}
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+        self._sampler.start()
+
+    def _sample_loop(self):
+        own_ident = threading.get_ident()
+        while not self._stop.wait(settings.PROFILE_SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                if frame is None or ident == own_ident:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def track_current_thread(self):
+        self.threads.add(threading.get_ident())
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record wall time and, when the stage stays on one thread, CPU time"""
+        self.track_current_thread()
+        thread = threading.get_ident()
+        worker_cpu = []
+        token = _worker_cpu.set(worker_cpu)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            cpu_seconds = time.thread_time() - cpu_start + sum(worker_cpu)
+            _worker_cpu.reset(token)
+            same_thread = thread == threading.get_ident()
+            self.stages.append({
+                "stage": name,
+                "wall_ms": round((time.perf_counter() - wall_start) * 1000, 3),
+                "cpu_ms": round(cpu_seconds * 1000, 3) if same_thread else None,
+            })
+
+    def wrap_iter(self, iterable: Iterable, name: str) -> Iterable:
+        """Profile a stream whose items may be produced on different worker threads"""
+        if hasattr(iterable, "__aiter__"):
+            return self._wrap_async_iter(iterable, name)
+        return self._wrap_iter(iterable, name)
+
+    async def _wrap_async_iter(self, iterable: AsyncIterator, name: str) -> AsyncIterator:
+        # the event loop interleaves other requests, so only wall time is meaningful here
+        wall_start = time.perf_counter()
+        try:
+            async for item in iterable:
+                yield item
+        finally:
+            await iterable.aclose()
+            self.stages.append({
+                "stage": name,
+                "wall_ms": round((time.perf_counter() - wall_start) * 1000, 3),
+                "cpu_ms": None,
+            })
+
+    def _wrap_iter(self, iterable: Iterable, name: str) -> Iterator:
+        iterator = iter(iterable)
+        wall_start = time.perf_counter()
+        cpu_seconds = 0.0
+        try:
+            while True:
+                # each item is produced on a single thread, so per-item CPU deltas add up
+                self.track_current_thread()
+                cpu_start = time.thread_time()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    cpu_seconds += time.thread_time() - cpu_start
+                yield item
+        finally:
+            self.stages.append({
+                "stage": name,
+                "wall_ms": round((time.perf_counter() - wall_start) * 1000, 3),
+                "cpu_ms": round(cpu_seconds * 1000, 3),
+            })
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self.samples.most_common())
+
+    def finish(self):
+        """Stop sampling and store the profile"""
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._sampler.join()
+        profile = {
+            "request_id": self.request_id,
+            "path": self.path,
+            "started_at": self.started_at,
+            "total_ms": round((time.time() - self.started_at) * 1000, 3),
+            "sample_interval_ms": settings.PROFILE_SAMPLE_INTERVAL * 1000,
+            "samples": sum(self.samples.values()),
+            "stages": self.stages,
+            "folded": self.folded(),
+        }
+        get_redis().set(f"profile:{self.request_id}", json.dumps(profile), ex=settings.PROFILE_TTL)
+
+
+def get_profile(request_id: str) -> Optional[dict]:
+    profile = get_redis().get(f"profile:{request_id}")
+    return json.loads(profile) if profile else None
@@ -1,11 +1,34 @@
+from typing import Optional
 import redis
 from app.core.config import settings
 
-#Redis configuration
-redis_client = redis.Redis(
-    host=settings.REDIS_HOST,
-    port=settings.REDIS_PORT,
-    password=settings.REDIS_PASSWORD,
-    db=0,#use in case of multiple layers
-    decode_responses=True
-)
\ No newline at end of file
+# The client (and its connection pool) is created per worker process by the
+# FastAPI lifespan, never at import time, so a pre-forking server does not
+# share sockets between workers.
+_redis_client: Optional[redis.Redis] = None
+
+
+def init_redis() -> redis.Redis:
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            password=settings.REDIS_PASSWORD,
+            db=0,#use in case of multiple layers
+            decode_responses=True,
+            max_connections=settings.REDIS_MAX_CONNECTIONS,
+        )
+    return _redis_client
+
+
+def get_redis() -> redis.Redis:
+    """Return the process-wide Redis client, creating it on first use"""
+    return _redis_client or init_redis()
+
+
+def close_redis():
+    global _redis_client
+    if _redis_client is not None:
+        _redis_client.close()
+        _redis_client = None
@@ -0,0 +1,34 @@
+from difflib import SequenceMatcher
+from typing import List
+
+
+def diff_pages(previous: List[str], current: List[str]) -> dict:
+    """Match the pages of two revisions of a PDF by content hash.
+
+    Page numbers are 1-based. Unchanged pages come as [previous, current] pairs
+    because inserting or removing pages shifts the ones after them. Changed
+    pages are pairs too; pages only found in one revision are "added" or
+    "removed".
+    """
+    matcher = SequenceMatcher(None, previous, current, autojunk=False)
+    unchanged, changed, added, removed = [], [], [], []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            unchanged.extend([i + 1, j + 1] for i, j in zip(range(i1, i2), range(j1, j2)))
+        elif tag == "replace":
+            paired = min(i2 - i1, j2 - j1)
+            changed.extend([i1 + k + 1, j1 + k + 1] for k in range(paired))
+            removed.extend(range(i1 + paired + 1, i2 + 1))
+            added.extend(range(j1 + paired + 1, j2 + 1))
+        elif tag == "delete":
+            removed.extend(range(i1 + 1, i2 + 1))
+        elif tag == "insert":
+            added.extend(range(j1 + 1, j2 + 1))
+    return {
+        "previous_pages": len(previous),
+        "pages": len(current),
+        "unchanged": unchanged,
+        "changed": changed,
+        "added": added,
+        "removed": removed,
+    }
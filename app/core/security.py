@@ -3,7 +3,7 @@ from typing import Optional
 import jwt
 from pwdlib import PasswordHash
 from app.core.config import settings
-from app.core.redis import redis_client
+from app.core.redis import get_redis
 
 pwd_hash = PasswordHash.recommended()
 
@@ -40,7 +40,7 @@ def blacklist_token(token: str, expires_in: int):
     """
     Blacklist a token by adding it to Redis with an expiry.
     """
-    redis_client.setex(f"blacklist:{token}", expires_in, "blacklisted")
+    get_redis().setex(f"blacklist:{token}", expires_in, "blacklisted")
 
 
 
@@ -49,7 +49,7 @@ def is_token_blacklisted(token: str) -> bool:
     """
     Check if token is blacklisted.
     """
-    return redis_client.exists(f"blacklist:{token}") == 1
+    return get_redis().exists(f"blacklist:{token}") == 1
     
 
 def verify_access_token(token: str) -> Optional[int]:
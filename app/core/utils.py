@@ -1,42 +1,193 @@
-import pdfplumber
+import asyncio
 import hashlib
 import json
-from datetime import datetime
-from io import BytesIO
-from openai import OpenAI
+from dataclasses import dataclass
+from functools import cached_property
+from typing import Dict, List, Optional, Tuple
 from app.core.config import settings
+from app.core.extractors import PDFEngine, get_engine, page_content_hashes, preload_engines
+from app.core.limiter import extraction_limiter
+from app.core.normalizer import TextNormalizer
+from app.core.pipeline import ExtractionPool, extract_for_question
+import anyio
 from fastapi import UploadFile, HTTPException, status
-from app.core.redis import redis_client
+from app.core.redis import get_redis
+
+def preload_heavy_modules():
+    """Import the PDF libraries and the OpenAI SDK up front, e.g. in the server process before it forks workers"""
+    import openai
+    preload_engines()
+
+
+@dataclass
+class ExtractedDocument:
+    """Normalized pages of an uploaded PDF, identified by the SHA-256 of its bytes.
+
+    `complete` is False when only the first pages were extracted (see load_document_for_question).
+    """
+    document_hash: str
+    pages: List[str]
+    normalization: dict
+    complete: bool = True
+
+    @cached_property
+    def text(self) -> str:
+        return "\n".join(page for page in self.pages if page)
+
 
 class PDFExtractor:
 
     @staticmethod
     def extract_text_pdfplumber(file_content: bytes) -> str:
         """Extract text using pdfplumber (better for complex PDFs)"""
+        pages = PDFExtractor.extract_pages(file_content, engine="pdfplumber", fallback=False)
+        return "\n".join(page for page in pages if page).strip()
+
+    @staticmethod
+    def run_engine(engine: PDFEngine, file_content: bytes, page_numbers: Optional[List[int]] = None) -> List[str]:
+        """Run a single engine, treating unreadable documents as empty"""
         try:
-            pdf_file = BytesIO(file_content)
-            text = ""
-            
-            with pdfplumber.open(pdf_file) as pdf:
-                for page in pdf.pages:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-            
-            return text.strip()
+            return [page.strip() for page in engine.extract_pages(file_content, page_numbers)]
         except Exception as e:
-            return ""
-        
+            return []
+
+    @staticmethod
+    def is_insufficient(pages: List[str]) -> bool:
+        """Heuristic for a fast engine having missed most of the text layer"""
+        if not pages:
+            return True
+        total = sum(len(page) for page in pages)
+        return total < settings.PDF_FALLBACK_MIN_CHARS_PER_PAGE * len(pages)
+
     @classmethod
-    def extract_text(cls, file_content: bytes) -> str:
-        """Extract text"""
-        text = cls.extract_text_pdfplumber(file_content)
+    def extract_pages(cls, file_content: bytes, engine: Optional[str] = None, fallback: bool = True) -> List[str]:
+        """Extract per-page text, retrying with the fallback engine when too little text comes back"""
+        engine_name = engine or settings.PDF_ENGINE
+        pages = cls.run_engine(get_engine(engine_name), file_content)
+        if fallback:
+            pages = cls.with_fallback(file_content, engine_name, pages)
+        return pages
+
+    @classmethod
+    def with_fallback(cls, file_content: bytes, engine_name: str, pages: List[str]) -> List[str]:
+        """Swap in the fallback engine's pages when the chosen engine returned too little text"""
+        fallback_name = settings.PDF_FALLBACK_ENGINE
+        if fallback_name and fallback_name != engine_name and cls.is_insufficient(pages):
+            fallback_pages = cls.run_engine(get_engine(fallback_name), file_content)
+            if sum(map(len, fallback_pages)) > sum(map(len, pages)):
+                return fallback_pages
+        return pages
+
+    @staticmethod
+    def join_pages(pages: List[str]) -> str:
+        """Join page texts, rejecting documents without a usable text layer"""
+        text = "\n".join(page for page in pages if page).strip()
         if not text or len(text) < 50:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Could not extract sufficient text from PDF. The document might be empty or consist of images only."
             )
         return text
+
+    @classmethod
+    def extract_text(cls, file_content: bytes, engine: Optional[str] = None) -> str:
+        """Extract text"""
+        return cls.join_pages(cls.extract_pages(file_content, engine=engine))
+
+    @classmethod
+    def extract_normalized(cls, file_content: bytes, engine: Optional[str] = None) -> Tuple[List[str], dict]:
+        """Extract and normalize page texts, returning them with the normalization report"""
+        pages = cls.extract_pages(file_content, engine=engine)
+        return TextNormalizer.from_settings().normalize(pages)
+
+    @classmethod
+    def extract_revision(cls, file_content: bytes, engine: str, page_count: int, cached_pages: Dict[int, str]) -> Tuple[Dict[int, str], List[str], dict]:
+        """Extract only the pages missing from cached_pages, then normalize the whole document.
+
+        Returns the newly extracted pages by 0-based index (for the page cache)
+        along with the normalized pages and the normalization report.
+        """
+        missing = [index for index in range(page_count) if index not in cached_pages]
+        extracted = {}
+        if missing:
+            texts = cls.run_engine(get_engine(engine), file_content, missing)
+            if len(texts) != len(missing):
+                # the engine and the page hasher disagree on the page count; extract the usual way
+                return ({}, *cls.extract_normalized(file_content, engine=engine))
+            extracted = dict(zip(missing, texts))
+
+        pages = [cached_pages[index] if index in cached_pages else extracted[index] for index in range(page_count)]
+        pages = cls.with_fallback(file_content, engine, pages)
+        normalized, normalization = TextNormalizer.from_settings().normalize(pages)
+        return extracted, normalized, normalization
+
+    @classmethod
+    async def load_document(cls, file_content: bytes, engine: Optional[str] = None) -> ExtractedDocument:
+        """Return the normalized text of a PDF, from cache or from the extraction pool"""
+        engine_name = engine or settings.PDF_ENGINE
+        get_engine(engine_name)
+        document_hash = hashlib.sha256(file_content).hexdigest()
+
+        cached = CacheUtil.get_cached_document(document_hash, engine_name)
+        if cached:
+            return ExtractedDocument(document_hash, cached["pages"], cached["normalization"])
+
+        async with extraction_limiter.slot():
+            page_hashes = await ExtractionPool.run(page_content_hashes, file_content) if settings.PAGE_CACHE_ENABLED else []
+            if page_hashes:
+                # a revision of a PDF seen before only has its changed pages extracted
+                cached_pages = CacheUtil.get_cached_pages(engine_name, page_hashes)
+                extracted, pages, normalization = await ExtractionPool.run(
+                    cls.extract_revision, file_content, engine_name, len(page_hashes), cached_pages
+                )
+                CacheUtil.set_cached_pages(engine_name, {page_hashes[index]: text for index, text in extracted.items()})
+            else:
+                pages, normalization = await ExtractionPool.run(cls.extract_normalized, file_content, engine=engine_name)
+        cls.join_pages(pages)
+        CacheUtil.set_cached_document(document_hash, engine_name, pages, normalization)
+        if page_hashes:
+            CacheUtil.set_page_hashes(document_hash, page_hashes)
+        return ExtractedDocument(document_hash, pages, normalization)
+
+    @classmethod
+    async def load_document_for_question(cls, file_content: bytes, question: str, engine: Optional[str] = None) -> ExtractedDocument:
+        """Like load_document, but stop extracting once the pages read so far can answer the question.
+
+        Used by streaming, so generation starts before a long PDF is fully parsed.
+        Pages already in the page cache are not parsed again, and the page hashes
+        are always stored. Only documents that were read to the end are cached.
+        """
+        engine_name = engine or settings.PDF_ENGINE
+        pdf_engine = get_engine(engine_name)
+        if not settings.STREAM_PIPELINE_ENABLED:
+            return await cls.load_document(file_content, engine=engine_name)
+
+        document_hash = hashlib.sha256(file_content).hexdigest()
+        cached = CacheUtil.get_cached_document(document_hash, engine_name)
+        if cached:
+            return ExtractedDocument(document_hash, cached["pages"], cached["normalization"])
+
+        async with extraction_limiter.slot():
+            page_hashes = await ExtractionPool.run(page_content_hashes, file_content) if settings.PAGE_CACHE_ENABLED else []
+            # pages this engine already extracted, e.g. those a revision shares with an earlier upload
+            cached_pages = CacheUtil.get_cached_pages(engine_name, page_hashes) if page_hashes else {}
+            pages, complete = await extract_for_question(
+                file_content, pdf_engine, question, cached_pages, len(page_hashes) or None
+            )
+        if cls.is_insufficient(pages):
+            # a missing text layer or an unreadable page; the full path retries with the fallback engine
+            return await cls.load_document(file_content, engine=engine_name)
+
+        if page_hashes:
+            CacheUtil.set_cached_pages(engine_name, {
+                page_hashes[index]: text for index, text in enumerate(pages) if index not in cached_pages
+            })
+            CacheUtil.set_page_hashes(document_hash, page_hashes)
+        pages, normalization = await asyncio.to_thread(TextNormalizer.from_settings().normalize, pages)
+        cls.join_pages(pages)
+        if complete:
+            CacheUtil.set_cached_document(document_hash, engine_name, pages, normalization)
+        return ExtractedDocument(document_hash, pages, normalization, complete)
     
     @staticmethod
     def validate_pdf(file) -> bool:
@@ -52,11 +203,35 @@ class PDFExtractor:
 class LLMService:
     """Service for interacting with LLM providers"""
     
+    # shared by every LLMService so requests reuse one HTTP connection pool;
+    # streaming uses the async client so a disconnect can cancel the upstream request
+    _client = None
+    _async_client = None
+    
     def __init__(self):
         self.provider = settings.LLM_PROVIDER
         
         if self.provider == "openai":
-            self.client = OpenAI(api_key=settings.LLM_API_KEY)
+            self.client = self.init_client()
+            self.async_client = self._async_client
+    
+    @classmethod
+    def init_client(cls):
+        """Create the provider clients once per process (called from the app lifespan)"""
+        if cls._client is None and settings.LLM_PROVIDER == "openai":
+            from openai import AsyncOpenAI, OpenAI
+            cls._client = OpenAI(api_key=settings.LLM_API_KEY)
+            cls._async_client = AsyncOpenAI(api_key=settings.LLM_API_KEY)
+        return cls._client
+    
+    @classmethod
+    async def close_client(cls):
+        if cls._client is not None:
+            cls._client.close()
+            cls._client = None
+        if cls._async_client is not None:
+            await cls._async_client.close()
+            cls._async_client = None
     
     def get_system_prompt(self, pdf_text: str) -> str:
         """Generate comprehensive system prompt for PDF QA"""
@@ -110,30 +285,83 @@ class LLMService:
 
         **REMEMBER**: Your primary goal is accuracy and relevance. When in doubt, respond with "NOT_FOUND" rather than providing potentially incorrect information."""
 
-    def answer_question(self, pdf_text: str, question: str, stream:bool=False) -> str:
-        """Get answer from LLM based on PDF content and question"""
+    def get_collection_prompt(self, passages: List[dict]) -> str:
+        """System prompt for answering from passages retrieved across several documents"""
+        sources = "\n\n".join(
+            f"[{i}] ({passage['pdf_filename']}, page {passage['page']})\n{passage['text']}"
+            for i, passage in enumerate(passages, start=1)
+        )
+        return f"""You are an expert document analyst answering questions across a collection of PDF documents. Your task is to answer based STRICTLY on the numbered passages below, which were retrieved from different documents.
+
+        **PASSAGES:**
+        {sources}
+
+        **INSTRUCTIONS:**
+        1. Answer ONLY from the passages. Do not use external knowledge.
+        2. Cite every statement with the number of the passage it comes from, e.g. [1] or [2][3].
+        3. When documents disagree or differ, say so and cite each of them.
+        4. Keep answers concise but complete.
+        5. If the passages do not answer the question, respond with exactly: "NOT_FOUND"."""
+
+    def answer_from_passages(self, question: str, passages: List[dict]) -> str:
+        """Get an answer with passage citations for a question over a document collection"""
+        messages = [
+            {"role": "system", "content": self.get_collection_prompt(passages)},
+            {"role": "user", "content": question},
+        ]
+        if self.provider == "openai":
+            return self._answer_with_openai(messages)
+        raise ValueError(f"Unsupported LLM provider: {self.provider}")
+
+    def build_messages(self, pdf_text: str, question: str, history: Optional[List[dict]] = None, summary: str = "") -> List[dict]:
+        """Build the chat messages, keeping the document prompt first so it is an identical prefix on every turn"""
+        messages = [{"role": "system", "content": self.get_system_prompt(pdf_text)}]
+        if summary:
+            messages.append({"role": "system", "content": f"Summary of the earlier conversation:\n{summary}"})
+        for turn in history or []:
+            messages.append({"role": "user", "content": turn["question"]})
+            messages.append({"role": "assistant", "content": turn["answer"]})
+        messages.append({"role": "user", "content": question})
+        return messages
+
+    def answer_question(self, pdf_text: str, question: str, stream:bool=False, history: Optional[List[dict]] = None, summary: str = "") -> str:
+        """Get answer from LLM based on PDF content, question and optional conversation history"""
         try:
-            system_prompt = self.get_system_prompt(pdf_text)
+            messages = self.build_messages(pdf_text, question, history=history, summary=summary)
             
             if self.provider == "openai":
                 if stream:
-                    return self._answer_with_openai_stream(system_prompt, question)
+                    return self._answer_with_openai_stream(messages)
                 else:
-                    return self._answer_with_openai(system_prompt, question)
+                    return self._answer_with_openai(messages)
             else:
                 raise ValueError(f"Unsupported LLM provider: {self.provider}")
                 
         except Exception as e:
             raise
     
-    def _answer_with_openai(self, system_prompt: str, question: str) -> str:
+    def summarize_conversation(self, summary: str, turns: List[dict]) -> str:
+        """Fold older turns into the running conversation summary"""
+        transcript = "\n".join(f"User: {turn['question']}\nAssistant: {turn['answer']}" for turn in turns)
+        prompt = f"""Update the running summary of a conversation about a PDF document.
+        Keep every fact, figure and open question the user may refer back to. Stay under {settings.CHAT_SUMMARY_MAX_WORDS} words.
+
+        **CURRENT SUMMARY:**
+        {summary or "(empty)"}
+
+        **NEW TURNS:**
+        {transcript}
+
+        Respond with the updated summary only."""
+        if self.provider == "openai":
+            return self._answer_with_openai([{"role": "user", "content": prompt}])
+        raise ValueError(f"Unsupported LLM provider: {self.provider}")
+    
+    def _answer_with_openai(self, messages: List[dict]) -> str:
         """Answer using OpenAI"""
         response = self.client.chat.completions.create(
             model=settings.LLM_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": question}
-            ],
+            messages=messages,
             max_tokens=settings.MAX_TOKEN,
             temperature=settings.TEMPERATURE
         )
@@ -141,22 +369,27 @@ class LLMService:
         answer = response.choices[0].message.content.strip()
         return answer
     
-    def _answer_with_openai_stream(self, system_prompt: str, question: str):
-        """Stream response using OpenAI realtime completions"""
-        stream = self.client.chat.completions.create(
+    async def _answer_with_openai_stream(self, messages: List[dict]):
+        """Stream response using OpenAI realtime completions.
+
+        Closing the generator early closes the HTTP response, which stops generation at the provider.
+        """
+        stream = await self.async_client.chat.completions.create(
             model=settings.LLM_MODEL,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": question},
-            ],
+            messages=messages,
             max_tokens=settings.MAX_TOKEN,
             temperature=settings.TEMPERATURE,
             stream=True
         )
 
-        for chunk in stream:
-            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
-                yield chunk.choices[0].delta.content
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # shielded, as this also runs when the response task is being cancelled
+            with anyio.CancelScope(shield=True):
+                await stream.close()
                 
                 
                 
@@ -180,48 +413,193 @@ class CommonUtil:
         return file_bytes
     
     @staticmethod
-    def generate_stream_response(llm_service, pdf_text, filename, question,cache_key):
-        def event_stream():
+    def stream_chunks(chunks, on_complete=None, slot=None, request=None):
+        """Wrap LLM text chunks as Server-Sent Events, handing the full answer to on_complete at the end.
+
+        If the client disconnects (checked between chunks through `request`, or
+        the response task being cancelled), the upstream LLM request is closed,
+        the slot is released and on_complete is not called.
+        """
+        async def event_stream():
+            outcome = "aborted"
             try:
                 full_answer = ""
-                metadata = {
-                    "type": "metadata",
-                    "filename": filename,
-                    "question": question,
-                    "extracted_text_length": len(pdf_text),
-                    "timestamp": str(datetime.now())
-                }
-                # yield f"data: {json.dumps(metadata)}\n\n"
-
-                # Stream LLM chunks
-                for chunk in llm_service.answer_question(pdf_text, question, stream=True):
+                async for chunk in chunks:
+                    if request is not None and await request.is_disconnected():
+                        break
+                    if slot is not None:
+                        slot.keep_alive()
                     full_answer += chunk
                     yield f"data: {chunk}\n\n"
-                
-                CacheUtil.set_cached_answer(cache_key, full_answer)
+                else:
+                    outcome = "completed"
+                    if on_complete is not None:
+                        on_complete(full_answer)
 
             except Exception as e:
+                outcome = "failed"
                 error_data = {
                     "type": "error",
                     "message": "An error occurred during streaming."
                 }
                 yield f"data: {json.dumps(error_data)}\n\n"
+            
+            finally:
+                with anyio.CancelScope(shield=True):
+                    await chunks.aclose()
+                if slot is not None:
+                    slot.release()
+                StreamStats.record(outcome)
 
         return event_stream()
     
+    @staticmethod
+    def generate_stream_response(llm_service, pdf_text, filename, question,cache_key,slot=None,request=None):
+        # Stream LLM chunks
+        return CommonUtil.stream_chunks(
+            llm_service.answer_question(pdf_text, question, stream=True),
+            on_complete=(lambda answer: CacheUtil.set_cached_answer(cache_key, answer)) if cache_key else None,
+            slot=slot,
+            request=request
+        )
+
+
+class StreamStats:
+    """Counters of how answer streams ended, shared by all workers through Redis"""
+
+    KEY = "metrics:streams"
+    OUTCOMES = ("completed", "aborted", "failed")
+
+    @staticmethod
+    def record(outcome: str):
+        try:
+            get_redis().hincrby(StreamStats.KEY, outcome, 1)
+        except Exception as e:
+            # metrics must never break the stream teardown
+            pass
+
+    @staticmethod
+    def get() -> dict:
+        counts = get_redis().hgetall(StreamStats.KEY)
+        return {outcome: int(counts.get(outcome, 0)) for outcome in StreamStats.OUTCOMES}
+    
     
 class CacheUtil:
 
+    # Answers are grouped per document: one Redis hash per document, one field per
+    # question. Listing, counting and invalidating a document's answers is then a
+    # single command, with no SCAN over the keyspace.
+
+    @staticmethod
+    def answer_version() -> str:
+        """Model and prompt version, so upgrades never serve answers from the old setup"""
+        return f"{settings.LLM_MODEL}:{settings.PROMPT_VERSION}"
+
+    @staticmethod
+    def answers_key(document_hash: str) -> str:
+        return f"pdfqa:{CacheUtil.answer_version()}:{document_hash}"
+
+    @staticmethod
+    def stats_key(document_hash: str) -> str:
+        return f"pdfqa:stats:{CacheUtil.answer_version()}:{document_hash}"
+
     @staticmethod
-    def generate_key(pdf_text: str, question: str) -> str:
-        """Generate unique cache key based on PDF content + question."""
-        raw = pdf_text + "|" + question.lower().strip()
-        return "pdfqa:" + hashlib.sha256(raw.encode()).hexdigest()
+    def generate_key(document_hash: str, question: str) -> str:
+        """Generate cache key `document_hash:question_hash` for a question about a document."""
+        question_hash = hashlib.sha256(question.lower().strip().encode()).hexdigest()
+        return f"{document_hash}:{question_hash}"
 
     @staticmethod
     def get_cached_answer(key: str):
-        return redis_client.get(key)
+        document_hash, question_hash = key.split(":")
+        answer = get_redis().hget(CacheUtil.answers_key(document_hash), question_hash)
+        pipe = get_redis().pipeline()
+        pipe.hincrby(CacheUtil.stats_key(document_hash), "hits" if answer is not None else "misses", 1)
+        pipe.expire(CacheUtil.stats_key(document_hash), settings.ANSWER_CACHE_TTL)
+        pipe.execute()
+        return answer
+
+    @staticmethod
+    def set_cached_answer(key: str, answer: str, ttl: Optional[int] = None):
+        """Store an answer; the document's answers expire together `ttl` seconds after the last write"""
+        document_hash, question_hash = key.split(":")
+        pipe = get_redis().pipeline()
+        pipe.hset(CacheUtil.answers_key(document_hash), question_hash, answer)
+        pipe.expire(CacheUtil.answers_key(document_hash), ttl or settings.ANSWER_CACHE_TTL)
+        pipe.execute()
+
+    @staticmethod
+    def invalidate_document(document_hash: str) -> int:
+        """Drop every cached answer for a document, returning how many there were"""
+        pipe = get_redis().pipeline()
+        pipe.hlen(CacheUtil.answers_key(document_hash))
+        pipe.unlink(CacheUtil.answers_key(document_hash), CacheUtil.stats_key(document_hash))
+        removed, _ = pipe.execute()
+        return removed
+
+    @staticmethod
+    def document_stats(document_hash: str) -> dict:
+        pipe = get_redis().pipeline()
+        pipe.hlen(CacheUtil.answers_key(document_hash))
+        pipe.hgetall(CacheUtil.stats_key(document_hash))
+        cached_answers, stats = pipe.execute()
+        return {
+            "document_id": document_hash,
+            "version": CacheUtil.answer_version(),
+            "cached_answers": cached_answers,
+            "hits": int(stats.get("hits", 0)),
+            "misses": int(stats.get("misses", 0)),
+        }
+
+    @staticmethod
+    def document_key(document_hash: str, engine: str) -> str:
+        """Extracted text depends on the file, the engine and the normalization settings"""
+        return f"pdfpages:{document_hash}:{engine}:{TextNormalizer.from_settings().fingerprint}"
+
+    @staticmethod
+    def get_cached_document(document_hash: str, engine: str) -> Optional[dict]:
+        cached = get_redis().get(CacheUtil.document_key(document_hash, engine))
+        return json.loads(cached) if cached else None
+
+    @staticmethod
+    def set_cached_document(document_hash: str, engine: str, pages: List[str], normalization: dict):
+        get_redis().set(
+            CacheUtil.document_key(document_hash, engine),
+            json.dumps({"pages": pages, "normalization": normalization}),
+            ex=settings.EXTRACTION_CACHE_TTL
+        )
+
+    @staticmethod
+    def page_key(engine: str, page_hash: str) -> str:
+        """Raw page text depends only on the page's content streams and the engine"""
+        return f"pdfpage:{engine}:{page_hash}"
+
+    @staticmethod
+    def get_cached_pages(engine: str, page_hashes: List[str]) -> Dict[int, str]:
+        """Cached raw text of the given pages, by 0-based page index"""
+        texts = get_redis().mget([CacheUtil.page_key(engine, page_hash) for page_hash in page_hashes])
+        return {index: text for index, text in enumerate(texts) if text is not None}
+
+    @staticmethod
+    def set_cached_pages(engine: str, pages: Dict[str, str]):
+        """Store raw page texts keyed by page hash"""
+        if not pages:
+            return
+        pipe = get_redis().pipeline(transaction=False)
+        for page_hash, text in pages.items():
+            pipe.set(CacheUtil.page_key(engine, page_hash), text, ex=settings.EXTRACTION_CACHE_TTL)
+        pipe.execute()
+
+    @staticmethod
+    def page_hashes_key(document_hash: str) -> str:
+        return f"pdfpagehashes:{document_hash}"
+
+    @staticmethod
+    def get_page_hashes(document_hash: str) -> Optional[List[str]]:
+        """Page hashes of a document extracted within EXTRACTION_CACHE_TTL"""
+        cached = get_redis().get(CacheUtil.page_hashes_key(document_hash))
+        return json.loads(cached) if cached else None
 
     @staticmethod
-    def set_cached_answer(key: str, answer: str, ttl: int = 3600):
-        redis_client.set(key, answer, ex=ttl)
\ No newline at end of file
+    def set_page_hashes(document_hash: str, page_hashes: List[str]):
+        get_redis().set(CacheUtil.page_hashes_key(document_hash), json.dumps(page_hashes), ex=settings.EXTRACTION_CACHE_TTL)
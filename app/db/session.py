@@ -1,10 +1,29 @@
+from typing import Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# The engine (and its connection pool) is created per worker process by the
+# FastAPI lifespan; SessionLocal is bound to it once it exists.
+engine: Optional[Engine] = None
+SessionLocal = sessionmaker(autocommit=False, autoflush=False)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
+
+
+def init_engine() -> Engine:
+    global engine
+    if engine is None:
+        engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+        SessionLocal.configure(bind=engine)
+    return engine
+
+
+def dispose_engine():
+    global engine
+    if engine is not None:
+        engine.dispose()
+        engine = None
@@ -1,14 +1,34 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.core.config import settings
-from app.api import auth,bot
+from app.core.redis import init_redis, close_redis
+from app.core.utils import LLMService, ExtractionPool
+from app.db.session import init_engine, dispose_engine
+from app.api import auth,bot,chat,collection
 from fastapi.openapi.utils import get_openapi
 from fastapi.middleware.cors import CORSMiddleware
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create connection pools and the extraction pool per worker, and close them on shutdown"""
+    init_redis()
+    init_engine()
+    LLMService.init_client()
+    ExtractionPool.start()
+    try:
+        yield
+    finally:
+        ExtractionPool.shutdown()
+        await LLMService.close_client()
+        dispose_engine()
+        close_redis()
+
 
 app = FastAPI(
     title=settings.APP_NAME,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 origins = [
@@ -53,4 +73,6 @@ def system_route():
 
 app.include_router(auth.router,prefix="/api/auth",tags=["Auth Routers"])
 app.include_router(bot.router,prefix="/api/bot",tags=["Chatbot Routers"])
+app.include_router(chat.router,prefix="/api/chat",tags=["Chat Session Routers"])
+app.include_router(collection.router,prefix="/api/collection",tags=["Document Collection Routers"])
 
@@ -1,14 +1,44 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional, Tuple
 from datetime import datetime
 
+class NormalizationStats(BaseModel):
+    characters_before: int
+    characters_after: int
+    characters_removed: int
+    tokens_before: int
+    tokens_after: int
+    tokens_removed: int
+    repeated_lines_removed: int
+    page_number_lines_removed: int
+    pages_dropped: int
+
 class PDFQuestionResponse(BaseModel):
     question: str
     answer: str
     pdf_filename: str
+    document_id: Optional[str] = None
     extracted_text_length: int
     processing_time: float
     timestamp: datetime
+    normalization: Optional[NormalizationStats] = None
+    
+class DocumentCacheStats(BaseModel):
+    document_id: str
+    version: str
+    cached_answers: int
+    hits: int
+    misses: int
+    
+class RevisionDiff(BaseModel):
+    document_id: str
+    previous_document_id: str
+    pages: int
+    previous_pages: int
+    unchanged: List[Tuple[int, int]]
+    changed: List[Tuple[int, int]]
+    added: List[int]
+    removed: List[int]
     
 class ErrorResponse(BaseModel):
     error: str
@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from app.schema.bot import NormalizationStats
+
+class ChatSessionResponse(BaseModel):
+    session_id: str
+    pdf_filename: str
+    extracted_text_length: int
+    created_at: datetime
+    normalization: Optional[NormalizationStats] = None
+    
+class ChatTurn(BaseModel):
+    question: str
+    answer: str
+    timestamp: Optional[datetime] = None
+    
+class ChatHistoryResponse(ChatSessionResponse):
+    summary: str
+    turns: List[ChatTurn]
+    
+class ChatAnswerResponse(BaseModel):
+    session_id: str
+    question: str
+    answer: str
+    processing_time: float
+    timestamp: datetime
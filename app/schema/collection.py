@@ -0,0 +1,27 @@
+from pydantic import BaseModel
+from typing import List, Optional
+from datetime import datetime
+from app.schema.bot import NormalizationStats
+
+class CollectionDocument(BaseModel):
+    document_id: str
+    pdf_filename: str
+    pages: int
+    chunks: int
+    added_at: datetime
+    pages_reindexed: Optional[int] = None
+    normalization: Optional[NormalizationStats] = None
+    
+class Citation(BaseModel):
+    document_id: str
+    pdf_filename: str
+    page: int
+    score: float
+    snippet: str
+    
+class CollectionAnswerResponse(BaseModel):
+    question: str
+    answer: str
+    citations: List[Citation]
+    processing_time: float
+    timestamp: datetime
@@ -0,0 +1,123 @@
+"""Compare PDF extraction engines on a local corpus.
+
+Reports pages/sec for every engine and text fidelity against a reference
+engine (token-level F1, 1.0 means the same words came out).
+
+Usage:
+    python -m benchmarks.extraction_benchmark /path/to/pdfs
+    python -m benchmarks.extraction_benchmark /path/to/pdfs --engines pypdfium2 pdfminer --repeat 3
+"""
+import argparse
+import json
+import re
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List
+
+from app.core.extractors import PDF_ENGINES, get_engine
+
+TOKEN_RE = re.compile(r"\w+")
+
+
+def token_f1(candidate: str, reference: str) -> float:
+    """Bag-of-words F1 between two texts, insensitive to layout and ordering"""
+    candidate_tokens = Counter(TOKEN_RE.findall(candidate.lower()))
+    reference_tokens = Counter(TOKEN_RE.findall(reference.lower()))
+    if not candidate_tokens and not reference_tokens:
+        return 1.0
+    overlap = sum((candidate_tokens & reference_tokens).values())
+    if not overlap:
+        return 0.0
+    precision = overlap / sum(candidate_tokens.values())
+    recall = overlap / sum(reference_tokens.values())
+    return 2 * precision * recall / (precision + recall)
+
+
+def benchmark_engine(name: str, documents: Dict[str, bytes], repeat: int) -> Dict:
+    """Time one engine over the corpus, keeping the extracted text of the last run"""
+    engine = get_engine(name)
+    texts: Dict[str, str] = {}
+    pages = 0
+    failures = 0
+    try:
+        # warm-up so library import time is not billed to the first engine
+        engine.extract_pages(next(iter(documents.values())))
+    except Exception:
+        pass
+    started = time.perf_counter()
+    for _ in range(repeat):
+        pages = 0
+        for path, content in documents.items():
+            try:
+                page_texts = engine.extract_pages(content)
+            except Exception:
+                failures += 1
+                texts[path] = ""
+                continue
+            pages += len(page_texts)
+            texts[path] = "\n".join(page_texts)
+    elapsed = (time.perf_counter() - started) / repeat
+    return {
+        "engine": name,
+        "pages": pages,
+        "seconds": elapsed,
+        "pages_per_sec": pages / elapsed if elapsed else 0.0,
+        "failures": failures // repeat,
+        "texts": texts,
+    }
+
+
+def load_corpus(corpus: Path) -> Dict[str, bytes]:
+    paths = [corpus] if corpus.is_file() else sorted(corpus.rglob("*.pdf"))
+    return {str(path): path.read_bytes() for path in paths}
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("corpus", type=Path, help="PDF file or directory searched recursively for *.pdf")
+    parser.add_argument("--engines", nargs="+", default=list(PDF_ENGINES), choices=list(PDF_ENGINES))
+    parser.add_argument("--reference", default="pdfplumber", choices=list(PDF_ENGINES),
+                        help="engine whose output is treated as ground truth for fidelity")
+    parser.add_argument("--repeat", type=int, default=1, help="runs per engine, timings are averaged")
+    parser.add_argument("--json", type=Path, help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    documents = load_corpus(args.corpus)
+    if not documents:
+        print(f"No PDF files found in {args.corpus}", file=sys.stderr)
+        return 1
+
+    engines = list(dict.fromkeys([args.reference] + args.engines))
+    results = {name: benchmark_engine(name, documents, max(args.repeat, 1)) for name in engines}
+    reference = results[args.reference]
+
+    print(f"{len(documents)} documents, reference engine: {args.reference}\n")
+    print(f"{'engine':<12}{'pages':>8}{'seconds':>10}{'pages/sec':>12}{'speedup':>10}{'fidelity':>10}{'failures':>10}")
+    rows = []
+    for name in engines:
+        result = results[name]
+        fidelity = sum(
+            token_f1(result["texts"][path], reference["texts"][path]) for path in documents
+        ) / len(documents)
+        speedup = reference["seconds"] / result["seconds"] if result["seconds"] else 0.0
+        rows.append({
+            "engine": name,
+            "pages": result["pages"],
+            "seconds": round(result["seconds"], 4),
+            "pages_per_sec": round(result["pages_per_sec"], 2),
+            "speedup": round(speedup, 2),
+            "fidelity": round(fidelity, 4),
+            "failures": result["failures"],
+        })
+        print(f"{name:<12}{result['pages']:>8}{result['seconds']:>10.3f}{result['pages_per_sec']:>12.1f}"
+              f"{speedup:>9.2f}x{fidelity:>10.3f}{result['failures']:>10}")
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""Measure cold start and time-to-first-request of the API server.
+
+For each run a fresh server process is started and the benchmark records:
+  - import:        seconds to `import app.main` in a fresh interpreter
+  - ready:         seconds from process start until the health check answers
+  - first_request: latency of the first request to --path
+  - warm_request:  median latency of the following requests to --path
+
+Needs the same environment variables as the app (.env values exported).
+
+Usage:
+    python -m benchmarks.startup_benchmark
+    python -m benchmarks.startup_benchmark --server gunicorn --workers 4 --runs 5
+"""
+import argparse
+import json
+import os
+import signal
+import statistics
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from typing import Dict, List
+
+IMPORT_SNIPPET = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+
+
+def measure_import() -> float:
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def server_command(server: str, port: int, workers: int) -> List[str]:
+    if server == "gunicorn":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", f"127.0.0.1:{port}",
+                "--workers", str(workers), "app.main:app"]
+    return [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--workers", str(workers)]
+
+
+def timed_get(url: str) -> float:
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=30) as response:
+            response.read()
+    except urllib.error.HTTPError:
+        # any HTTP answer (e.g. 401 on an authenticated path) still counts as served
+        pass
+    return time.perf_counter() - started
+
+
+def measure_run(args) -> Dict[str, float]:
+    base = f"http://127.0.0.1:{args.port}"
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        server_command(args.server, args.port, args.workers),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True,
+    )
+    try:
+        deadline = started + args.timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"server exited with code {process.returncode}")
+            try:
+                with urllib.request.urlopen(f"{base}/system-check/", timeout=1):
+                    break
+            except (urllib.error.URLError, ConnectionError, OSError):
+                if time.perf_counter() > deadline:
+                    raise RuntimeError("server did not become ready in time")
+                time.sleep(0.02)
+        ready = time.perf_counter() - started
+
+        first_request = timed_get(base + args.path)
+        warm = [timed_get(base + args.path) for _ in range(args.warm_requests)]
+        return {
+            "ready": ready,
+            "first_request": first_request,
+            "warm_request": statistics.median(warm) if warm else 0.0,
+        }
+    finally:
+        os.killpg(process.pid, signal.SIGTERM)
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            os.killpg(process.pid, signal.SIGKILL)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--server", choices=["uvicorn", "gunicorn"], default="uvicorn")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--path", default="/docs", help="path timed for the first and warm requests")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--warm-requests", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    imports = [measure_import() for _ in range(args.runs)]
+    runs = [measure_run(args) for _ in range(args.runs)]
+
+    results = {"import": statistics.median(imports)}
+    for metric in ("ready", "first_request", "warm_request"):
+        results[metric] = statistics.median(run[metric] for run in runs)
+
+    print(f"{args.server} x{args.workers}, median of {args.runs} runs")
+    for metric, value in results.items():
+        print(f"{metric:<15}{value * 1000:>10.1f} ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
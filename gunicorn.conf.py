@@ -0,0 +1,25 @@
+# Production server: gunicorn managing uvicorn workers.
+#   gunicorn -c gunicorn.conf.py app.main:app
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = "uvicorn.workers.UvicornWorker"
+timeout = int(os.getenv("WORKER_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("KEEPALIVE", 5))
+
+# Import the app (and the heavy PDF/LLM libraries below) once in the master so
+# workers fork with them already loaded. Redis, DB, LLM and extraction pools
+# are created per worker by the FastAPI lifespan, after the fork.
+preload_app = True
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server):
+    from app.core.utils import preload_heavy_modules
+
+    preload_heavy_modules()